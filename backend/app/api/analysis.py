@@ -17,7 +17,7 @@ from app.modules.selenium_a11y import run_a11y_selenium
 from app.modules.selenium_renderer import render_website_selenium
 
 # Existing modules
-from app.modules.visual_analysis import analyze_visual
+from app.modules.visual_analysis import Severity, analyze_visual
 from app.modules.text_analysis import TextAnalyzer
 from app.modules.scoring import ScoringEngine
 from app.modules.cta_detector import detect_ctas
@@ -360,13 +360,9 @@ async def perform_website_analysis(url: str) -> dict:
         'score_breakdown': visual_report.features,
         'issues': [
             {
-                'type': issue.type,
-                'selector': issue.selector,
-                'bbox': issue.bbox,
-                'severity': issue.severity,
-                'message': issue.message,
+                **issue.to_dict(),
                 'element': issue.selector,  # Frontend expects 'element' field
-                'suggestion': _get_visual_suggestion(issue.type, issue.severity)  # Proper suggestion
+                'suggestion': _get_visual_suggestion(issue.type, str(issue.severity))  # Proper suggestion
             }
             for issue in visual_report.issues
         ],
@@ -375,9 +371,9 @@ async def perform_website_analysis(url: str) -> dict:
         'visual_issues': [
             {
                 'element': issue.selector,
-                'severity': issue.severity,
+                'severity': str(issue.severity),
                 'message': issue.message,
-                'suggestion': _get_visual_suggestion(issue.type, issue.severity),
+                'suggestion': _get_visual_suggestion(issue.type, str(issue.severity)),
                 'type': issue.type
             }
             for issue in visual_report.issues
@@ -442,6 +438,7 @@ async def perform_website_analysis(url: str) -> dict:
                 'viewport': 'desktop',
                 'timing': 'http_fallback',
                 'screenshot_base64': basic_result.get('screenshots', {}).get('viewport', ''),
+                'screenshot_mime': 'image/png',
                 'elements_detected': len(basic_result.get('elements', [])),
                 'render_metrics': basic_result.get('performance', {})
             }
@@ -461,6 +458,7 @@ async def perform_website_analysis(url: str) -> dict:
                 'viewport': result.viewport,
                 'timing': result.timing,
                 'screenshot_base64': result.screenshot_base64,
+                'screenshot_mime': result.screenshot_mime,
                 'elements_detected': len(result.element_bounding_boxes),
                 'render_metrics': result.render_metrics
             }
@@ -495,12 +493,15 @@ async def perform_website_analysis(url: str) -> dict:
     
     # Add screenshots from results
     if use_fallback:
+        # The HTTP fallback captures with Selenium, which always produces PNG
         screenshot_base64 = basic_result.get('screenshots', {}).get('viewport', '')
         if screenshot_base64:
             final_result['screenshot_url'] = f"data:image/png;base64,{screenshot_base64}"
     else:
-        if primary_result and primary_result.screenshot_base64:
-            final_result['screenshot_url'] = f"data:image/png;base64,{primary_result.screenshot_base64}"
+        if primary_result and primary_result.screenshot_bytes:
+            final_result['screenshot_url'] = (
+                f"data:{primary_result.screenshot_mime};base64,{primary_result.screenshot_base64}"
+            )
     
     # Ensure visual and text issues are in the expected format
     final_result['visual_issues'] = visual_result.get('visual_issues', [])
@@ -883,7 +884,7 @@ def _generate_recommendations_from_issues(issues) -> List[dict]:
     # Contrast recommendations
     if 'contrast' in issue_types:
         contrast_issues = [issue for issue in issues if issue.type == 'contrast']
-        high_contrast_issues = [issue for issue in contrast_issues if issue.severity == 'high']
+        high_contrast_issues = [issue for issue in contrast_issues if issue.severity == Severity.HIGH]
         
         recommendations.append({
             'category': 'WCAG Compliance',
@@ -0,0 +1,22 @@
+"""
+Event loop selection for the backend's standalone scripts
+"""
+
+import asyncio
+from typing import Any, Coroutine, TypeVar
+
+T = TypeVar("T")
+
+
+def run(coro: Coroutine[Any, Any, T]) -> T:
+    """
+    Run a coroutine to completion like asyncio.run, on a uvloop event loop
+    when uvloop is installed (it ships with uvicorn[standard] on non-Windows hosts)
+    """
+    try:
+        import uvloop
+    except ImportError:
+        return asyncio.run(coro)
+
+    with asyncio.Runner(loop_factory=uvloop.new_event_loop) as runner:
+        return runner.run(coro)
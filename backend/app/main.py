@@ -1,5 +1,6 @@
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 import os
 import sys
@@ -38,7 +39,9 @@ app = FastAPI(
     title="ClarityCheck API",
     description="Website Visual Clarity and Text Readability Analysis API",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    # orjson encodes the large analysis payloads (base64 screenshots) much faster
+    default_response_class=ORJSONResponse
 )
 
 # CORS middleware
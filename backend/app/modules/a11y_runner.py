@@ -13,6 +13,9 @@ import time
 
 logger = logging.getLogger(__name__)
 
+# axe failureSummary headings that introduce each list of technical fixes
+_AXE_FIX_PREAMBLES = ('Fix any of the following:', 'Fix all of the following:')
+
 
 @dataclass
 class A11yIssue:
@@ -73,18 +76,27 @@ class AccessibilityRunner:
         'focusable-content': 'keyboard',
     }
     
-    def __init__(self):
-        self.browser: Optional[Browser] = None
+    def __init__(self, browser: Optional[Browser] = None):
+        """
+        Args:
+            browser: Already-launched browser to run pages in. Its lifetime stays
+                with the caller; when omitted the runner launches and closes its own.
+        """
+        self.browser: Optional[Browser] = browser
         self.playwright = None
+        self._owns_browser = browser is None
         
     async def __aenter__(self):
         """Initialize Playwright context"""
-        self.playwright = await async_playwright().start()
-        self.browser = await self.playwright.chromium.launch(headless=True)
+        if self._owns_browser:
+            self.playwright = await async_playwright().start()
+            self.browser = await self.playwright.chromium.launch(headless=True)
         return self
         
     async def __aexit__(self, exc_type, exc_val, exc_tb):
         """Clean up resources"""
+        if not self._owns_browser:
+            return
         if self.browser:
             await self.browser.close()
         if self.playwright:
@@ -259,8 +271,11 @@ class AccessibilityRunner:
         if rule_id in friendly_messages:
             return friendly_messages[rule_id]
         else:
-            # Clean up technical failure summary
-            return failure_summary.split('Fix any')[0].strip() if 'Fix any' in failure_summary else failure_summary
+            # Clean up technical failure summary: drop the headings, keep the fixes
+            message = failure_summary
+            for preamble in _AXE_FIX_PREAMBLES:
+                message = message.replace(preamble, '')
+            return ' '.join(message.split()) or failure_summary
 
 
 # Convenience function for easy usage
@@ -297,4 +312,5 @@ if __name__ == "__main__":
             print(f"  Element: {issue.selector}")
             print(f"  Issue: {issue.message}")
     
-    asyncio.run(main())
\ No newline at end of file
+    with asyncio.Runner() as loop_runner:
+        loop_runner.run(main())
\ No newline at end of file
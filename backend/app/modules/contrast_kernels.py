@@ -0,0 +1,57 @@
+"""
+WCAG Contrast Kernels
+
+Batch sRGB -> relative luminance -> contrast ratio math, JIT-compiled with
+Numba so a page's colors are scored in one native loop instead of per
+element in Python.
+"""
+
+import numpy as np
+from numba import njit
+
+
+def _srgb_to_linear(c: float) -> float:
+    """Gamma-decode one sRGB channel in [0, 1] (WCAG piecewise formula)"""
+    return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
+
+
+# Linear value of every 8-bit channel level, so the kernel does a table load
+# instead of a pow() per channel
+_SRGB_LUT = np.array([_srgb_to_linear(i / 255.0) for i in range(256)], dtype=np.float64)
+
+
+@njit(cache=True)
+def _relative_luminance(r: int, g: int, b: int) -> float:
+    """WCAG relative luminance of an 8-bit sRGB color (ITU-R BT.709 weights)"""
+    return 0.2126 * _SRGB_LUT[r] + 0.7152 * _SRGB_LUT[g] + 0.0722 * _SRGB_LUT[b]
+
+
+@njit(cache=True)
+def wcag_contrast(fg: np.ndarray, bg: np.ndarray, out: np.ndarray) -> None:
+    """
+    Write the contrast ratio of each fg[i]/bg[i] pair of (n, 3) 8-bit RGB rows
+    into out[i]
+    """
+    for i in range(fg.shape[0]):
+        l1 = _relative_luminance(fg[i, 0], fg[i, 1], fg[i, 2])
+        l2 = _relative_luminance(bg[i, 0], bg[i, 1], bg[i, 2])
+        
+        # Lighter color is the numerator
+        out[i] = (max(l1, l2) + 0.05) / (min(l1, l2) + 0.05)
+
+
+def contrast_ratios(fg: np.ndarray, bg: np.ndarray) -> np.ndarray:
+    """
+    Contrast ratios for matching rows of two (n, 3) RGB arrays
+    
+    Channels are clamped to 0-255 (as browsers do) so they always index the LUT.
+    """
+    fg = np.ascontiguousarray(np.clip(fg, 0, 255), dtype=np.uint8)
+    bg = np.ascontiguousarray(np.clip(bg, 0, 255), dtype=np.uint8)
+    out = np.empty(fg.shape[0], dtype=np.float64)
+    wcag_contrast(fg, bg, out)
+    return out
+
+
+# Compile (or load the on-disk cache) at import rather than on the first page
+contrast_ratios(np.zeros((1, 3)), np.zeros((1, 3)))
@@ -0,0 +1,88 @@
+"""
+Pairwise Overlap Kernels
+
+Finds element pairs whose bounding boxes overlap by more than a fraction of
+the smaller box. Small pages use NumPy broadcasting over the N x N grid; large
+pages use a parallel Numba kernel that never materializes the N^2 matrices.
+"""
+
+from typing import Tuple
+
+import numpy as np
+from numba import njit, prange
+
+# Below this many elements the broadcast is cheaper than the kernel dispatch
+PARALLEL_MIN_ELEMENTS = 200
+
+
+@njit(cache=True)
+def _overlaps(x, y, w, h, i, j, threshold):
+    """Whether boxes i and j overlap (not just touch) by > threshold of the smaller box"""
+    inter_w = min(x[i] + w[i], x[j] + w[j]) - max(x[i], x[j])
+    inter_h = min(y[i] + h[i], y[j] + h[j]) - max(y[i], y[j])
+    min_area = min(w[i] * h[i], w[j] * h[j])
+    return inter_w > 0 and inter_h > 0 and inter_w * inter_h > min_area * threshold
+
+
+@njit(parallel=True, cache=True)
+def _overlapping_pairs_parallel(x, y, w, h, threshold):
+    """
+    Two passes over rows in parallel: count each row's pairs, then write them
+    at that row's prefix-sum offset so the output stays in (i, j) order
+    """
+    n = x.shape[0]
+    counts = np.zeros(n, dtype=np.int64)
+    for i in prange(n):
+        for j in range(i + 1, n):
+            if _overlaps(x, y, w, h, i, j, threshold):
+                counts[i] += 1
+    
+    offsets = np.zeros(n + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum(counts)
+    pairs_i = np.empty(offsets[n], dtype=np.int64)
+    pairs_j = np.empty(offsets[n], dtype=np.int64)
+    
+    for i in prange(n):
+        k = offsets[i]
+        for j in range(i + 1, n):
+            if _overlaps(x, y, w, h, i, j, threshold):
+                pairs_i[k] = i
+                pairs_j[k] = j
+                k += 1
+    
+    return pairs_i, pairs_j
+
+
+def _overlapping_pairs_numpy(x, y, w, h, threshold):
+    """Intersection extents for every pair at once (N x N broadcast)"""
+    right, bottom = x + w, y + h
+    inter_w = np.minimum(right[:, None], right[None, :]) - np.maximum(x[:, None], x[None, :])
+    inter_h = np.minimum(bottom[:, None], bottom[None, :]) - np.maximum(y[:, None], y[None, :])
+    areas = w * h
+    min_area = np.minimum(areas[:, None], areas[None, :])
+    
+    overlapping = (inter_w > 0) & (inter_h > 0) & (inter_w * inter_h > min_area * threshold)
+    
+    # Upper triangle keeps each pair once, in (i, j) order
+    return np.nonzero(np.triu(overlapping, 1))
+
+
+def overlapping_pairs(
+    x: np.ndarray,
+    y: np.ndarray,
+    w: np.ndarray,
+    h: np.ndarray,
+    threshold: float = 0.1
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Index arrays (i, j), i < j in row-major order, of boxes that overlap by
+    more than threshold of the smaller box's area
+    """
+    x, y, w, h = (np.ascontiguousarray(column, dtype=np.float64) for column in (x, y, w, h))
+    if x.shape[0] < PARALLEL_MIN_ELEMENTS:
+        return _overlapping_pairs_numpy(x, y, w, h, threshold)
+    return _overlapping_pairs_parallel(x, y, w, h, threshold)
+
+
+# Compile (or load the on-disk cache) at import rather than on the first large page
+_overlapping_pairs_parallel(*(np.zeros(1) for _ in range(4)), 0.1)
@@ -15,31 +15,221 @@ Version: 2.0.0
 
 import re
 import math
+import sys
+from bisect import bisect_left, bisect_right
 from dataclasses import dataclass, field
+from enum import IntEnum
+from functools import lru_cache
 from typing import Dict, List, Any, Tuple, Optional
+import numpy as np
+import orjson
 from bs4 import BeautifulSoup, Tag
 from wcag_contrast_ratio import rgb, passes_AA, passes_AAA
 import logging
 
+from .contrast_kernels import contrast_ratios
+from .overlap_kernels import overlapping_pairs
+
 logger = logging.getLogger(__name__)
 
+# Color parsing patterns, compiled once at import
+_RGB_RE = re.compile(r'rgb\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)')
+_RGBA_RE = re.compile(r'rgba\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*[\d.]+\s*\)')
+_HEX6_RE = re.compile(r'#([0-9a-fA-F]{6})')
+_HEX3_RE = re.compile(r'#([0-9a-fA-F]{3})')
+
+# Length/number patterns for font sizes and line heights
+_LENGTH_RE = re.compile(r'([0-9.]+)(px|pt|em|rem|%)?')
+_NUMBER_RE = re.compile(r'([0-9.]+)')
+
+# Selector fragments marking an element as interactive (tap targets, density)
+_INTERACTIVE_SELECTORS = ('a', 'button', 'input', '[onclick]', '[role="button"]')
+_BOLD_WEIGHTS = ('bold', '700', '800', '900')
+
+# Record layout for element bboxes, ingested in one contiguous array
+BBOX_DT = np.dtype([('x', 'f8'), ('y', 'f8'), ('width', 'f8'), ('height', 'f8')])
+
+_NAMED_COLORS = {
+    'black': (0, 0, 0), 'white': (255, 255, 255),
+    'red': (255, 0, 0), 'green': (0, 128, 0), 'blue': (0, 0, 255),
+    'yellow': (255, 255, 0), 'cyan': (0, 255, 255), 'magenta': (255, 0, 255)
+}
+
+
+def _parse_bboxes(elements: list) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Read element bboxes into a BBOX_DT record array (missing values are 0),
+    plus a mask of the elements whose bbox could be read
+    """
+    n = len(elements)
+    valid = np.ones(n, dtype=bool)
+    try:
+        # Single allocation filled straight from the dicts, no intermediate list
+        boxes = np.fromiter(
+            (
+                (bbox.get('x', 0), bbox.get('y', 0), bbox.get('width', 0), bbox.get('height', 0))
+                for bbox in (element.get('bbox', {}) for element in elements)
+            ),
+            dtype=BBOX_DT,
+            count=n
+        )
+    except Exception:
+        # Go element by element so a malformed bbox only drops that element
+        boxes = np.zeros(n, dtype=BBOX_DT)
+        for i, element in enumerate(elements):
+            try:
+                bbox = element.get('bbox', {})
+                boxes[i] = (bbox.get('x', 0), bbox.get('y', 0), bbox.get('width', 0), bbox.get('height', 0))
+            except Exception as e:
+                logger.warning(f"Error parsing bbox for element: {e}")
+                boxes[i] = 0
+                valid[i] = False
+    return boxes, valid
+
+
+# Style values repeat across elements and pages; each parser sees a string once
+@lru_cache(maxsize=4096)
+def _parse_color(color_str: str) -> Optional[Tuple[int, int, int]]:
+    """Parse CSS color string to RGB tuple"""
+    try:
+        # Handle rgb() format
+        rgb_match = _RGB_RE.search(color_str)
+        if rgb_match:
+            return tuple(map(int, rgb_match.groups()))
+
+        # Handle rgba() format (ignore alpha)
+        rgba_match = _RGBA_RE.search(color_str)
+        if rgba_match:
+            return tuple(map(int, rgba_match.groups()))
+
+        # Handle hex format
+        hex_match = _HEX6_RE.search(color_str)
+        if hex_match:
+            hex_color = hex_match.group(1)
+            return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
+
+        # Handle 3-digit hex
+        hex3_match = _HEX3_RE.search(color_str)
+        if hex3_match:
+            hex_color = hex3_match.group(1)
+            return tuple(int(c*2, 16) for c in hex_color)
+
+        # Handle named colors
+        return _NAMED_COLORS.get(color_str.lower())
+
+    except Exception as e:
+        logger.warning(f"Failed to parse color '{color_str}': {e}")
+        return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_font_size(font_size_str: str) -> float:
+    """Parse font size string to pixels"""
+    try:
+        match = _LENGTH_RE.search(font_size_str)
+        if match:
+            size = float(match.group(1))
+            unit = match.group(2) or 'px'
+
+            if unit == 'px':
+                return size
+            elif unit == 'pt':
+                return size * 1.33333
+            elif unit in ['em', 'rem']:
+                return size * 16  # Assuming 16px base
+            elif unit == '%':
+                return (size / 100) * 16  # Assuming 16px base
+
+        return 16.0  # Default
+    except:
+        return 16.0
+
+
+@lru_cache(maxsize=4096)
+def _parse_line_height(line_height_str: str, font_size: float) -> Optional[float]:
+    """Parse line height relative to font size"""
+    try:
+        if line_height_str == 'normal':
+            return 1.2
+
+        if 'px' in line_height_str:
+            lh_px = float(_NUMBER_RE.search(line_height_str).group(1))
+            return lh_px / font_size
+        elif '%' in line_height_str:
+            return float(_NUMBER_RE.search(line_height_str).group(1)) / 100
+        else:
+            # Unitless value
+            return float(line_height_str)
+    except:
+        return None
+
+
+def _parse_style(parser, *args):
+    """
+    Call a cached style parser, falling back to the uncached one for values
+    that cannot be hashed (malformed snapshots)
+    """
+    try:
+        return parser(*args)
+    except TypeError:
+        return parser.__wrapped__(*args)
+
 
-@dataclass
+# API names for Severity values, indexed by value
+_SEVERITY_NAMES = ('low', 'medium', 'high')
+
+
+class Severity(IntEnum):
+    """Issue severity, ordered so that higher is worse"""
+    LOW = 0
+    MEDIUM = 1
+    HIGH = 2
+    
+    def __str__(self) -> str:
+        return _SEVERITY_NAMES[self]
+
+
+@dataclass(slots=True, frozen=True)
 class Issue:
     """Represents a visual analysis issue"""
     type: str  # contrast, typography, tap_target, overlap, density, alignment
     selector: str
     bbox: Dict[str, float]  # {x, y, width, height}
-    severity: str  # high, medium, low
+    severity: Severity
     message: str
+    
+    def __post_init__(self):
+        # Selectors repeat across issues and reports; share one string object each
+        for name in ('type', 'selector'):
+            value = getattr(self, name)
+            if type(value) is str:
+                object.__setattr__(self, name, sys.intern(value))
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """API representation, with severity as its string name"""
+        return {
+            'type': self.type,
+            'selector': self.selector,
+            'bbox': self.bbox,
+            'severity': str(self.severity),
+            'message': self.message
+        }
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class VisualReport:
     """Complete visual analysis report"""
     score: int  # 0-100
     issues: List[Issue] = field(default_factory=list)
     features: Dict[str, Any] = field(default_factory=dict)
+    
+    def to_dict(self) -> Dict[str, Any]:
+        """API representation of the report"""
+        return {
+            'score': self.score,
+            'issues': [issue.to_dict() for issue in self.issues],
+            'features': self.features
+        }
 
 
 def analyze_visual(dom: str, css_snapshot: dict, viewport: tuple[int, int]) -> VisualReport:
@@ -65,12 +255,30 @@ def analyze_visual(dom: str, css_snapshot: dict, viewport: tuple[int, int]) -> V
                 type="error",
                 selector="body", 
                 bbox={"x": 0, "y": 0, "width": 0, "height": 0},
-                severity="high",
+                severity=Severity.HIGH,
                 message=f"Analysis failed: {str(e)}"
             )]
         )
 
 
+def analyze_visual_cached(dom: str, css_snapshot: dict, viewport: tuple[int, int]) -> VisualReport:
+    """
+    Memoized analyze_visual for repeated identical inputs (batch runs, tests)
+    
+    The snapshot is keyed by its sorted-key JSON encoding, so it must be
+    JSON-serializable. Equal inputs return the same VisualReport object, which
+    callers must not mutate.
+    """
+    return _analyze_visual_frozen(
+        dom, orjson.dumps(css_snapshot, option=orjson.OPT_SORT_KEYS), tuple(viewport)
+    )
+
+
+@lru_cache(maxsize=32)
+def _analyze_visual_frozen(dom: str, css_key: bytes, viewport: tuple[int, int]) -> VisualReport:
+    return analyze_visual(dom, orjson.loads(css_key), viewport)
+
+
 class VisualAnalyzer:
     """Core visual analysis engine"""
     
@@ -88,13 +296,16 @@ class VisualAnalyzer:
         # Reset issues for new analysis
         self.issues = []
         
+        # Parse bboxes and styles once; every rule reads the same columns
+        parsed = self._parse_elements(elements_data)
+        
         # Run all analysis functions
-        contrast_score = self._analyze_contrast(soup, computed_styles, elements_data)
-        typography_score = self._analyze_typography(soup, computed_styles, elements_data)
-        tap_target_score = self._analyze_tap_targets(soup, elements_data)
-        overlap_score = self._analyze_overlap(elements_data)
-        density_score = self._analyze_density(elements_data)
-        alignment_score = self._analyze_alignment(elements_data)
+        contrast_score = self._analyze_contrast(soup, computed_styles, elements_data, parsed)
+        typography_score = self._analyze_typography(soup, computed_styles, elements_data, parsed)
+        tap_target_score = self._analyze_tap_targets(soup, elements_data, parsed)
+        overlap_score = self._analyze_overlap(elements_data, parsed)
+        density_score = self._analyze_density(elements_data, parsed)
+        alignment_score = self._analyze_alignment(elements_data, parsed)
         
         # Calculate weighted overall score
         weights = {
@@ -135,104 +346,173 @@ class VisualAnalyzer:
             features=features
         )
     
-    def _analyze_contrast(self, soup: BeautifulSoup, computed_styles: dict, elements: list) -> float:
-        """Analyze WCAG contrast compliance"""
-        score = 100.0
+    def _parse_elements(self, elements: list) -> Dict[str, np.ndarray]:
+        """
+        Parse every element's bbox and styles once into column arrays
         
-        for element in elements:
+        Columns (length N): x, y, width, height, has_bbox, is_interactive,
+        has_text, font_size, is_bold, line_height (NaN when unparseable),
+        has_colors, and (N, 3) fg/bg RGB. Elements whose text or styles cannot
+        be read get has_text=False and are skipped by the text rules.
+        """
+        n = len(elements)
+        boxes, has_bbox = _parse_bboxes(elements)
+        
+        is_interactive = np.zeros(n, dtype=bool)
+        has_text = np.zeros(n, dtype=bool)
+        font_size = np.full(n, 16.0)
+        is_bold = np.zeros(n, dtype=bool)
+        line_height = np.full(n, np.nan)
+        has_colors = np.zeros(n, dtype=bool)
+        fg = np.zeros((n, 3), dtype=np.int64)
+        bg = np.zeros((n, 3), dtype=np.int64)
+        
+        for i, element in enumerate(elements):
+            try:
+                selector = element.get('selector', '')
+                is_interactive[i] = any(sel in selector.lower() for sel in _INTERACTIVE_SELECTORS)
+            except Exception as e:
+                logger.warning(f"Error parsing selector for element: {e}")
+            
             try:
                 # Skip non-text elements
                 if not element.get('text', '').strip():
                     continue
-                    
-                styles = element.get('styles', {})
-                bbox = element.get('bbox', {})
-                
-                # Get colors
-                fg_color = self._parse_color(styles.get('color', 'rgb(0,0,0)'))
-                bg_color = self._parse_color(styles.get('backgroundColor', 'rgb(255,255,255)'))
-                
-                if not fg_color or not bg_color:
-                    continue
-                    
-                # Calculate contrast ratio
-                contrast_ratio = self._calculate_contrast_ratio(fg_color, bg_color)
                 
-                # Determine if text is large
-                font_size = self._parse_font_size(styles.get('fontSize', '16px'))
-                font_weight = styles.get('fontWeight', 'normal')
-                is_large = font_size >= 18 or (font_size >= 14 and font_weight in ['bold', '700', '800', '900'])
+                styles = element.get('styles', {})
+                size = _parse_style(_parse_font_size, styles.get('fontSize', '16px'))
+                lh = _parse_style(_parse_line_height, styles.get('lineHeight', 'normal'), size)
+                fg_color = _parse_style(_parse_color, styles.get('color', 'rgb(0,0,0)'))
+                bg_color = _parse_style(_parse_color, styles.get('backgroundColor', 'rgb(255,255,255)'))
                 
-                # WCAG thresholds
-                aa_threshold = 3.0 if is_large else 4.5
-                aaa_threshold = 4.5 if is_large else 7.0
+                font_size[i] = size
+                is_bold[i] = styles.get('fontWeight', 'normal') in _BOLD_WEIGHTS
+                if lh is not None:
+                    line_height[i] = lh
+                if fg_color and bg_color:
+                    fg[i] = fg_color
+                    bg[i] = bg_color
+                    has_colors[i] = True
+                has_text[i] = True
                 
-                # Check compliance
-                if contrast_ratio < aa_threshold:
-                    severity = 'high' if contrast_ratio < 3.0 else 'medium'
-                    score -= 15 if severity == 'high' else 10
-                    
-                    element_desc = self._get_element_description(element.get('selector', 'unknown'))
-                    self.issues.append(Issue(
-                        type='contrast',
-                        selector=element.get('selector', 'unknown'),
-                        bbox=bbox,
-                        severity=severity,
-                        message=f'Poor color contrast on {element_desc} makes text hard to read, especially for users with visual impairments'
-                    ))
-                elif contrast_ratio < aaa_threshold:
-                    score -= 3  # Minor penalty for AAA non-compliance
-                    
-                    element_desc = self._get_element_description(element.get('selector', 'unknown'))
-                    self.issues.append(Issue(
-                        type='contrast',
-                        selector=element.get('selector', 'unknown'),
-                        bbox=bbox,
-                        severity='low',
-                        message=f'Moderate color contrast on {element_desc} could be improved for better accessibility'
-                    ))
-                    
             except Exception as e:
-                logger.warning(f"Error analyzing contrast for element: {e}")
+                logger.warning(f"Error parsing styles for element: {e}")
                 continue
+        
+        return {
+            'x': boxes['x'],
+            'y': boxes['y'],
+            'width': boxes['width'],
+            'height': boxes['height'],
+            'has_bbox': has_bbox,
+            'is_interactive': is_interactive,
+            'has_text': has_text,
+            'font_size': font_size,
+            'is_bold': is_bold,
+            'line_height': line_height,
+            'has_colors': has_colors,
+            'fg': fg,
+            'bg': bg
+        }
+    
+    def _analyze_contrast(self, soup: BeautifulSoup, computed_styles: dict, elements: list,
+                          parsed: Dict[str, np.ndarray]) -> float:
+        """Analyze WCAG contrast compliance"""
+        score = 100.0
+        
+        # Text elements with both colors parsed, scored in one kernel call
+        indices = np.nonzero(parsed['has_text'] & parsed['has_colors'])[0]
+        if not len(indices):
+            return score
+        
+        ratios = contrast_ratios(parsed['fg'][indices], parsed['bg'][indices])
+        
+        # Determine if text is large
+        font_size = parsed['font_size'][indices]
+        is_large = (font_size >= 18) | ((font_size >= 14) & parsed['is_bold'][indices])
+        
+        # WCAG thresholds
+        aa_thresholds = np.where(is_large, 3.0, 4.5)
+        aaa_thresholds = np.where(is_large, 4.5, 7.0)
+        
+        for i, contrast_ratio, aa_threshold, aaa_threshold in zip(
+            indices.tolist(), ratios.tolist(), aa_thresholds.tolist(), aaa_thresholds.tolist()
+        ):
+            element = elements[i]
+            bbox = element.get('bbox', {})
+            
+            # Check compliance
+            if contrast_ratio < aa_threshold:
+                severity = Severity.HIGH if contrast_ratio < 3.0 else Severity.MEDIUM
+                score -= 15 if severity == Severity.HIGH else 10
+                
+                element_desc = self._get_element_description(element.get('selector', 'unknown'))
+                self.issues.append(Issue(
+                    type='contrast',
+                    selector=element.get('selector', 'unknown'),
+                    bbox=bbox,
+                    severity=severity,
+                    message=f'Poor color contrast on {element_desc} makes text hard to read, especially for users with visual impairments'
+                ))
+            elif contrast_ratio < aaa_threshold:
+                score -= 3  # Minor penalty for AAA non-compliance
+                
+                element_desc = self._get_element_description(element.get('selector', 'unknown'))
+                self.issues.append(Issue(
+                    type='contrast',
+                    selector=element.get('selector', 'unknown'),
+                    bbox=bbox,
+                    severity=Severity.LOW,
+                    message=f'Moderate color contrast on {element_desc} could be improved for better accessibility'
+                ))
                 
         return max(0, score)
     
-    def _analyze_typography(self, soup: BeautifulSoup, computed_styles: dict, elements: list) -> float:
+    def _analyze_typography(self, soup: BeautifulSoup, computed_styles: dict, elements: list,
+                            parsed: Dict[str, np.ndarray]) -> float:
         """Analyze typography issues"""
         score = 100.0
+        min_size = 14 if self.is_mobile else 16
         
-        for element in elements:
-            try:
-                # Skip non-text elements
-                if not element.get('text', '').strip():
-                    continue
-                    
-                styles = element.get('styles', {})
-                bbox = element.get('bbox', {})
-                text = element.get('text', '')
-                
-                # Font size analysis
-                font_size = self._parse_font_size(styles.get('fontSize', '16px'))
-                min_size = 14 if self.is_mobile else 16
+        for i in np.nonzero(parsed['has_text'])[0].tolist():
+            element = elements[i]
+            bbox = element.get('bbox', {})
+            font_size = float(parsed['font_size'][i])
+            
+            # Font size analysis
+            if font_size < min_size:
+                severity = Severity.HIGH if font_size < 12 else Severity.MEDIUM
+                score -= 12 if severity == Severity.HIGH else 8
                 
-                if font_size < min_size:
-                    severity = 'high' if font_size < 12 else 'medium'
-                    score -= 12 if severity == 'high' else 8
-                    
-                    element_desc = self._get_element_description(element.get('selector', 'unknown'))
-                    device = "mobile devices" if self.is_mobile else "desktop screens"
-                    self.issues.append(Issue(
-                        type='typography',
-                        selector=element.get('selector', 'unknown'),
-                        bbox=bbox,
-                        severity=severity,
-                        message=f'Text too small on {element_desc} ({font_size}px) causes reading difficulty on {device}'
-                    ))
+                element_desc = self._get_element_description(element.get('selector', 'unknown'))
+                device = "mobile devices" if self.is_mobile else "desktop screens"
+                self.issues.append(Issue(
+                    type='typography',
+                    selector=element.get('selector', 'unknown'),
+                    bbox=bbox,
+                    severity=severity,
+                    message=f'Text too small on {element_desc} ({font_size}px) causes reading difficulty on {device}'
+                ))
+            
+            # Line height analysis (NaN when it could not be parsed)
+            line_height = float(parsed['line_height'][i])
+            if line_height and line_height < 1.3:
+                score -= 5
                 
-                # Line height analysis
-                line_height = self._parse_line_height(styles.get('lineHeight', 'normal'), font_size)
-                if line_height and line_height < 1.3:
+                element_desc = self._get_element_description(element.get('selector', 'unknown'))
+                self.issues.append(Issue(
+                    type='typography',
+                    selector=element.get('selector', 'unknown'),
+                    bbox=bbox,
+                    severity=Severity.MEDIUM,
+                    message=f'Lines too close together on {element_desc} (line-height: {line_height:.1f}) reduces readability'
+                ))
+            
+            # Line length analysis (approximate)
+            width = float(parsed['width'][i])
+            if parsed['has_bbox'][i] and width > 0 and font_size > 0:
+                chars_per_line = width / (font_size * 0.6)  # Rough estimate
+                if chars_per_line > 90:
                     score -= 5
                     
                     element_desc = self._get_element_description(element.get('selector', 'unknown'))
@@ -240,231 +520,160 @@ class VisualAnalyzer:
                         type='typography',
                         selector=element.get('selector', 'unknown'),
                         bbox=bbox,
-                        severity='medium',
-                        message=f'Lines too close together on {element_desc} (line-height: {line_height:.1f}) reduces readability'
+                        severity=Severity.LOW,
+                        message=f'Text lines too long on {element_desc} (~{chars_per_line:.0f} characters) makes reading tiring'
                     ))
                 
-                # Line length analysis (approximate)
-                if bbox.get('width', 0) > 0 and font_size > 0:
-                    chars_per_line = bbox['width'] / (font_size * 0.6)  # Rough estimate
-                    if chars_per_line > 90:
-                        score -= 5
-                        
-                        element_desc = self._get_element_description(element.get('selector', 'unknown'))
-                        self.issues.append(Issue(
-                            type='typography',
-                            selector=element.get('selector', 'unknown'),
-                            bbox=bbox,
-                            severity='low',
-                            message=f'Text lines too long on {element_desc} (~{chars_per_line:.0f} characters) makes reading tiring'
-                        ))
-                        
-            except Exception as e:
-                logger.warning(f"Error analyzing typography for element: {e}")
-                continue
-                
         return max(0, score)
     
-    def _analyze_tap_targets(self, soup: BeautifulSoup, elements: list) -> float:
+    def _analyze_tap_targets(self, soup: BeautifulSoup, elements: list, parsed: Dict[str, np.ndarray]) -> float:
         """Analyze tap target sizes for mobile"""
         if not self.is_mobile:
             return 100.0  # Only relevant for mobile
             
         score = 100.0
+        widths, heights = parsed['width'], parsed['height']
         
-        interactive_selectors = ['a', 'button', 'input', '[onclick]', '[role="button"]']
+        # WCAG recommends 44x44px minimum
+        too_small = parsed['is_interactive'] & parsed['has_bbox'] & ((widths < 44) | (heights < 44))
         
-        for element in elements:
-            try:
-                selector = element.get('selector', '')
-                bbox = element.get('bbox', {})
-                
-                # Check if element is interactive
-                is_interactive = any(sel in selector.lower() for sel in interactive_selectors)
-                if not is_interactive:
-                    continue
-                    
-                width = bbox.get('width', 0)
-                height = bbox.get('height', 0)
-                
-                # WCAG recommends 44x44px minimum
-                if width < 44 or height < 44:
-                    severity = 'high' if (width < 32 or height < 32) else 'medium'
-                    score -= 15 if severity == 'high' else 10
-                    
-                    element_desc = self._get_element_description(selector)
-                    self.issues.append(Issue(
-                        type='tap_target',
-                        selector=selector,
-                        bbox=bbox,
-                        severity=severity,
-                        message=f'{element_desc.title()} too small for mobile tapping ({width:.0f}x{height:.0f}px)'
-                    ))
-                    
-            except Exception as e:
-                logger.warning(f"Error analyzing tap targets for element: {e}")
-                continue
+        for i in np.nonzero(too_small)[0].tolist():
+            element = elements[i]
+            selector = element.get('selector', '')
+            width, height = float(widths[i]), float(heights[i])
+            
+            severity = Severity.HIGH if (width < 32 or height < 32) else Severity.MEDIUM
+            score -= 15 if severity == Severity.HIGH else 10
+            
+            element_desc = self._get_element_description(selector)
+            self.issues.append(Issue(
+                type='tap_target',
+                selector=selector,
+                bbox=element.get('bbox', {}),
+                severity=severity,
+                message=f'{element_desc.title()} too small for mobile tapping ({width:.0f}x{height:.0f}px)'
+            ))
                 
         return max(0, score)
     
-    def _analyze_overlap(self, elements: list) -> float:
+    def _analyze_overlap(self, elements: list, parsed: Dict[str, np.ndarray]) -> float:
         """Detect overlapping elements"""
         score = 100.0
-        checked_pairs = set()
         
-        for i, elem1 in enumerate(elements):
-            for j, elem2 in enumerate(elements[i+1:], i+1):
-                try:
-                    # Avoid checking same pair twice
-                    pair_key = (min(i, j), max(i, j))
-                    if pair_key in checked_pairs:
-                        continue
-                    checked_pairs.add(pair_key)
-                    
-                    bbox1 = elem1.get('bbox', {})
-                    bbox2 = elem2.get('bbox', {})
-                    
-                    if self._boxes_overlap(bbox1, bbox2):
-                        # Check if it's meaningful overlap (not just touching edges)
-                        overlap_area = self._calculate_overlap_area(bbox1, bbox2)
-                        min_area = min(bbox1.get('width', 0) * bbox1.get('height', 0),
-                                     bbox2.get('width', 0) * bbox2.get('height', 0))
-                        
-                        if overlap_area > min_area * 0.1:  # 10% overlap threshold
-                            score -= 8
-                            
-                            elem1_desc = self._get_element_description(elem1.get('selector', 'unknown'))
-                            elem2_desc = self._get_element_description(elem2.get('selector', 'unknown'))
-                            self.issues.append(Issue(
-                                type='overlap',
-                                selector=f"{elem1.get('selector', 'unknown')} ∩ {elem2.get('selector', 'unknown')}",
-                                bbox=bbox1,
-                                severity='medium',
-                                message=f'Elements overlapping: {elem1_desc} and {elem2_desc} creating visual confusion'
-                            ))
-                            
-                except Exception as e:
-                    logger.warning(f"Error analyzing overlap: {e}")
-                    continue
+        # Meaningful overlap (not just touching edges): over 10% of the smaller box
+        pairs_i, pairs_j = overlapping_pairs(
+            parsed['x'], parsed['y'], parsed['width'], parsed['height'], threshold=0.1
+        )
+        
+        for i, j in zip(pairs_i.tolist(), pairs_j.tolist()):
+            elem1, elem2 = elements[i], elements[j]
+            score -= 8
+            
+            elem1_desc = self._get_element_description(elem1.get('selector', 'unknown'))
+            elem2_desc = self._get_element_description(elem2.get('selector', 'unknown'))
+            self.issues.append(Issue(
+                type='overlap',
+                selector=f"{elem1.get('selector', 'unknown')} ∩ {elem2.get('selector', 'unknown')}",
+                bbox=elem1.get('bbox', {}),
+                severity=Severity.MEDIUM,
+                message=f'Elements overlapping: {elem1_desc} and {elem2_desc} creating visual confusion'
+            ))
                     
         return max(0, score)
     
-    def _analyze_density(self, elements: list) -> float:
+    def _analyze_density(self, elements: list, parsed: Dict[str, np.ndarray]) -> float:
         """Analyze interactive element density"""
         score = 100.0
         
         # Define regions (1000x800px blocks)
         region_width = 1000
         region_height = 800
+        max_per_region = 20
         
-        regions = {}
-        interactive_selectors = ['a', 'button', 'input', '[onclick]', '[role="button"]']
+        # No region can be dense unless the whole page is; skip the binning
+        interactive = np.nonzero(parsed['is_interactive'] & parsed['has_bbox'])[0]
+        if len(interactive) <= max_per_region:
+            return score
         
-        for element in elements:
-            try:
-                selector = element.get('selector', '')
-                bbox = element.get('bbox', {})
-                
-                # Check if element is interactive
-                is_interactive = any(sel in selector.lower() for sel in interactive_selectors)
-                if not is_interactive:
-                    continue
-                    
-                x = bbox.get('x', 0)
-                y = bbox.get('y', 0)
-                
-                # Determine which region this element belongs to
-                region_x = int(x // region_width)
-                region_y = int(y // region_height)
-                region_key = (region_x, region_y)
-                
-                if region_key not in regions:
-                    regions[region_key] = []
-                regions[region_key].append(element)
-                
-            except Exception as e:
-                logger.warning(f"Error analyzing density for element: {e}")
-                continue
+        # Bin every element into its region at once and count per occupied region
+        region_keys = np.stack([
+            parsed['x'][interactive] // region_width,
+            parsed['y'][interactive] // region_height
+        ], axis=1)
+        regions, first_index, counts = np.unique(
+            region_keys, axis=0, return_index=True, return_counts=True
+        )
         
-        # Check each region for high density
-        for region_key, region_elements in regions.items():
-            if len(region_elements) > 20:
+        # Check each region for high density, in order of first appearance
+        for k in np.argsort(first_index):
+            if counts[k] > max_per_region:
                 score -= 15
                 
                 # Use first element's bbox as representative
-                representative_bbox = region_elements[0].get('bbox', {})
+                representative_bbox = elements[interactive[first_index[k]]].get('bbox', {})
                 
                 self.issues.append(Issue(
                     type='density',
-                    selector=f'region_{region_key[0]}_{region_key[1]}',
+                    selector=f'region_{int(regions[k, 0])}_{int(regions[k, 1])}',
                     bbox=representative_bbox,
-                    severity='medium',
-                    message=f'Too many interactive elements clustered together ({len(region_elements)} elements) overwhelming users'
+                    severity=Severity.MEDIUM,
+                    message=f'Too many interactive elements clustered together ({counts[k]} elements) overwhelming users'
                 ))
                 
         return max(0, score)
     
-    def _analyze_alignment(self, elements: list) -> float:
+    def _analyze_alignment(self, elements: list, parsed: Dict[str, np.ndarray]) -> float:
         """Analyze element alignment in columns"""
         score = 100.0
+        xs, ys = parsed['x'], parsed['y']
         
-        # Group elements by approximate vertical position (within 20px)
-        rows = []
+        # Group elements by approximate vertical position (within 20px of the
+        # first element of a row, joining the earliest such row). Row anchors are
+        # kept sorted so each lookup only inspects rows near y.
         tolerance = 20
+        rows = []  # element indices per row, in creation order
+        anchor_ys = []  # sorted row anchor y values
+        anchor_rows = []  # row index of each sorted anchor
         
-        for element in elements:
-            try:
-                bbox = element.get('bbox', {})
-                y = bbox.get('y', 0)
-                
-                # Find existing row or create new one
-                row_found = False
-                for row in rows:
-                    if abs(row['y'] - y) <= tolerance:
-                        row['elements'].append(element)
-                        row_found = True
-                        break
-                
-                if not row_found:
-                    rows.append({
-                        'y': y,
-                        'elements': [element]
-                    })
-                    
-            except Exception as e:
-                logger.warning(f"Error grouping elements for alignment: {e}")
-                continue
+        for index in np.nonzero(parsed['has_bbox'])[0].tolist():
+            y = float(ys[index])
+            lo = bisect_left(anchor_ys, y - tolerance - 1)
+            hi = bisect_right(anchor_ys, y + tolerance + 1)
+            matches = [
+                anchor_rows[k] for k in range(lo, hi)
+                if abs(anchor_ys[k] - y) <= tolerance
+            ]
+            
+            if matches:
+                rows[min(matches)].append(index)
+            else:
+                position = bisect_left(anchor_ys, y)
+                anchor_ys.insert(position, y)
+                anchor_rows.insert(position, len(rows))
+                rows.append([index])
         
         # Check alignment within each row
         for row in rows:
-            if len(row['elements']) < 3:  # Need at least 3 elements to check alignment
+            if len(row) < 3:  # Need at least 3 elements to check alignment
                 continue
+            
+            left_edges = xs[row]
+            max_deviation = float(left_edges.max() - left_edges.min())
+            
+            # More than 8px deviation (0 when all aligned)
+            if max_deviation > 8:
+                score -= 5
                 
-            try:
-                left_edges = [elem.get('bbox', {}).get('x', 0) for elem in row['elements']]
+                # Use first element as representative
+                representative_bbox = elements[row[0]].get('bbox', {})
                 
-                # Check for consistent alignment
-                if len(set(left_edges)) > 1:  # Not all aligned
-                    min_x = min(left_edges)
-                    max_deviation = max(abs(x - min_x) for x in left_edges)
-                    
-                    if max_deviation > 8:  # More than 8px deviation
-                        score -= 5
-                        
-                        # Use first element as representative
-                        representative_bbox = row['elements'][0].get('bbox', {})
-                        
-                        self.issues.append(Issue(
-                            type='alignment',
-                            selector=f'row_y_{row["y"]:.0f}',
-                            bbox=representative_bbox,
-                            severity='low',
-                            message=f'Elements misaligned in row (deviation: {max_deviation:.0f}px) creating unprofessional appearance'
-                        ))
-                        
-            except Exception as e:
-                logger.warning(f"Error analyzing alignment for row: {e}")
-                continue
+                self.issues.append(Issue(
+                    type='alignment',
+                    selector=f'row_y_{ys[row[0]]:.0f}',
+                    bbox=representative_bbox,
+                    severity=Severity.LOW,
+                    message=f'Elements misaligned in row (deviation: {max_deviation:.0f}px) creating unprofessional appearance'
+                ))
                 
         return max(0, score)
     
@@ -499,143 +708,3 @@ class VisualAnalyzer:
                 tag = tag_match.group(1)
                 return f"{tag} element"
             return "page element"
-    
-    def _parse_color(self, color_str: str) -> Optional[Tuple[int, int, int]]:
-        """Parse CSS color string to RGB tuple"""
-        try:
-            # Handle rgb() format
-            rgb_match = re.search(r'rgb\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*\)', color_str)
-            if rgb_match:
-                return tuple(map(int, rgb_match.groups()))
-            
-            # Handle rgba() format (ignore alpha)
-            rgba_match = re.search(r'rgba\s*\(\s*(\d+)\s*,\s*(\d+)\s*,\s*(\d+)\s*,\s*[\d.]+\s*\)', color_str)
-            if rgba_match:
-                return tuple(map(int, rgba_match.groups()))
-            
-            # Handle hex format
-            hex_match = re.search(r'#([0-9a-fA-F]{6})', color_str)
-            if hex_match:
-                hex_color = hex_match.group(1)
-                return tuple(int(hex_color[i:i+2], 16) for i in (0, 2, 4))
-            
-            # Handle 3-digit hex
-            hex3_match = re.search(r'#([0-9a-fA-F]{3})', color_str)
-            if hex3_match:
-                hex_color = hex3_match.group(1)
-                return tuple(int(c*2, 16) for c in hex_color)
-            
-            # Handle named colors
-            color_map = {
-                'black': (0, 0, 0), 'white': (255, 255, 255),
-                'red': (255, 0, 0), 'green': (0, 128, 0), 'blue': (0, 0, 255),
-                'yellow': (255, 255, 0), 'cyan': (0, 255, 255), 'magenta': (255, 0, 255)
-            }
-            return color_map.get(color_str.lower())
-            
-        except Exception as e:
-            logger.warning(f"Failed to parse color '{color_str}': {e}")
-            return None
-    
-    def _calculate_contrast_ratio(self, fg: Tuple[int, int, int], bg: Tuple[int, int, int]) -> float:
-        """Calculate WCAG contrast ratio between two colors"""
-        try:
-            # Use manual calculation as primary method (more reliable)
-            return self._calculate_contrast_manual(fg, bg)
-        except Exception as e:
-            logger.warning(f"Failed to calculate contrast ratio: {e}")
-            return 4.5  # Default safe value
-    
-    def _calculate_contrast_manual(self, fg: Tuple[int, int, int], bg: Tuple[int, int, int]) -> float:
-        """Manual WCAG contrast ratio calculation as fallback"""
-        def relative_luminance(rgb_tuple):
-            """Calculate relative luminance for RGB color"""
-            r, g, b = [c / 255.0 for c in rgb_tuple]
-            
-            # Apply gamma correction
-            def gamma_correct(c):
-                return c / 12.92 if c <= 0.03928 else ((c + 0.055) / 1.055) ** 2.4
-            
-            r = gamma_correct(r)
-            g = gamma_correct(g)  
-            b = gamma_correct(b)
-            
-            # Calculate luminance using ITU-R BT.709 coefficients
-            return 0.2126 * r + 0.7152 * g + 0.0722 * b
-        
-        # Calculate luminance for both colors
-        l1 = relative_luminance(fg)
-        l2 = relative_luminance(bg)
-        
-        # Ensure lighter color is numerator
-        light = max(l1, l2)
-        dark = min(l1, l2)
-        
-        # Calculate contrast ratio
-        return (light + 0.05) / (dark + 0.05)
-    
-    def _parse_font_size(self, font_size_str: str) -> float:
-        """Parse font size string to pixels"""
-        try:
-            match = re.search(r'([0-9.]+)(px|pt|em|rem|%)?', font_size_str)
-            if match:
-                size = float(match.group(1))
-                unit = match.group(2) or 'px'
-                
-                if unit == 'px':
-                    return size
-                elif unit == 'pt':
-                    return size * 1.33333
-                elif unit in ['em', 'rem']:
-                    return size * 16  # Assuming 16px base
-                elif unit == '%':
-                    return (size / 100) * 16  # Assuming 16px base
-                    
-            return 16.0  # Default
-        except:
-            return 16.0
-    
-    def _parse_line_height(self, line_height_str: str, font_size: float) -> Optional[float]:
-        """Parse line height relative to font size"""
-        try:
-            if line_height_str == 'normal':
-                return 1.2
-            
-            if 'px' in line_height_str:
-                lh_px = float(re.search(r'([0-9.]+)', line_height_str).group(1))
-                return lh_px / font_size
-            elif '%' in line_height_str:
-                return float(re.search(r'([0-9.]+)', line_height_str).group(1)) / 100
-            else:
-                # Unitless value
-                return float(line_height_str)
-        except:
-            return None
-    
-    def _boxes_overlap(self, bbox1: dict, bbox2: dict) -> bool:
-        """Check if two bounding boxes overlap"""
-        try:
-            x1, y1, w1, h1 = bbox1.get('x', 0), bbox1.get('y', 0), bbox1.get('width', 0), bbox1.get('height', 0)
-            x2, y2, w2, h2 = bbox2.get('x', 0), bbox2.get('y', 0), bbox2.get('width', 0), bbox2.get('height', 0)
-            
-            return not (x1 + w1 <= x2 or x2 + w2 <= x1 or y1 + h1 <= y2 or y2 + h2 <= y1)
-        except:
-            return False
-    
-    def _calculate_overlap_area(self, bbox1: dict, bbox2: dict) -> float:
-        """Calculate overlapping area between two bounding boxes"""
-        try:
-            x1, y1, w1, h1 = bbox1.get('x', 0), bbox1.get('y', 0), bbox1.get('width', 0), bbox1.get('height', 0)
-            x2, y2, w2, h2 = bbox2.get('x', 0), bbox2.get('y', 0), bbox2.get('width', 0), bbox2.get('height', 0)
-            
-            # Calculate intersection
-            left = max(x1, x2)
-            top = max(y1, y2)
-            right = min(x1 + w1, x2 + w2)
-            bottom = min(y1 + h1, y2 + h2)
-            
-            if left < right and top < bottom:
-                return (right - left) * (bottom - top)
-            return 0.0
-        except:
-            return 0.0
\ No newline at end of file
@@ -3,9 +3,13 @@
 Test script for the enhanced Playwright renderer
 """
 import asyncio
+import gzip
 import json
+import pickle
 import sys
+from itertools import islice
 from app.modules.renderer import WebsiteRenderer
+from app.core.event_loop import run
 
 async def test_renderer():
     """Test the enhanced website renderer with real websites"""
@@ -72,17 +76,17 @@ async def test_renderer():
                 print(f"⏱️ Total render time: {perf.get('render_time', 0):.2f}s")
                 
                 # Sample DOM elements (first 3 headings)
-                headings = dom_data.get('headings', [])[:3]
+                headings = dom_data.get('headings', [])
                 if headings:
                     print("📋 Sample Headings:")
-                    for heading in headings:
+                    for heading in islice(headings, 3):
                         print(f"   {heading['tag']}: {heading['text'][:50]}{'...' if len(heading['text']) > 50 else ''}")
                 
                 # Sample CTAs (first 3)
-                ctas = dom_data.get('ctas', [])[:3]
+                ctas = dom_data.get('ctas', [])
                 if ctas:
                     print("🔘 Sample CTAs:")
-                    for cta in ctas:
+                    for cta in islice(ctas, 3):
                         print(f"   {cta['tag']}: {cta['text'][:30]}{'...' if len(cta['text']) > 30 else ''}")
                 
                 print(f"🔗 Page Hash: {result.get('page_hash', 'No hash')}")
@@ -94,27 +98,48 @@ async def test_renderer():
     print("\n" + "=" * 50)
     print("🏁 Renderer testing complete!")
 
+# Lightweight keys persisted by save_sample_result; the heavy DOM/CSS trees are skipped
+_SAVE_KEYS = (
+    'url', 'title', 'final_url', 'page_hash', 'meta_description', 'lang',
+    'canonical_url', 'performance', 'word_count', 'paragraph_count',
+    'stylesheet_count', 'technical_data', 'visual_score', 'score_breakdown',
+    'wcag_compliance', 'recommendations'
+)
+
 def save_sample_result(result, filename="sample_render_result.json"):
     """Save a sample result for inspection"""
     try:
-        # Remove large screenshot data for readability
-        result_copy = result.copy()
-        if 'screenshots' in result_copy:
-            screenshots_info = {}
-            for key, value in result_copy['screenshots'].items():
-                if key == 'error':
-                    screenshots_info[key] = value
-                else:
-                    screenshots_info[key] = f"Base64 data ({len(value)} chars)"
-            result_copy['screenshots'] = screenshots_info
+        # Project only the keys worth inspecting instead of copying the whole result
+        view = {key: result[key] for key in _SAVE_KEYS if key in result}
+        
+        # Replace large screenshot data with its size for readability
+        if 'screenshots' in result:
+            view['screenshots'] = {
+                key: value if key == 'error' else f"Base64 data ({len(value)} chars)"
+                for key, value in result['screenshots'].items()
+            }
         
         with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(result_copy, f, indent=2, default=str)
+            json.dump(view, f, indent=2, default=str)
         print(f"📁 Sample result saved to {filename}")
     except Exception as e:
         print(f"❌ Failed to save sample: {str(e)}")
 
-async def test_single_website():
+def save_detailed_result(result, basename, as_json=False):
+    """Save a full render result as compressed pickle (or the JSON sample view)"""
+    if as_json:
+        save_sample_result(result, f"{basename}.json")
+        return
+    
+    filename = f"{basename}.pkl.gz"
+    try:
+        with gzip.open(filename, 'wb', compresslevel=3) as f:
+            pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+        print(f"📁 Detailed result saved to {filename}")
+    except Exception as e:
+        print(f"❌ Failed to save detailed result: {str(e)}")
+
+async def test_single_website(as_json=False):
     """Test with a single website and save detailed results"""
     url = input("Enter URL to test (or press Enter for example.com): ").strip()
     if not url:
@@ -134,7 +159,7 @@ async def test_single_website():
             print(f"🔍 Canonical: {result.get('canonical_url', 'None')}")
             
             # Save detailed result
-            save_sample_result(result, f"detailed_result_{result.get('page_hash', 'unknown')}.json")
+            save_detailed_result(result, f"detailed_result_{result.get('page_hash', 'unknown')}", as_json)
             
             # Technical data
             tech = result.get('technical_data', {})
@@ -155,6 +180,6 @@ async def test_single_website():
 
 if __name__ == "__main__":
     if len(sys.argv) > 1 and sys.argv[1] == "--single":
-        asyncio.run(test_single_website())
+        run(test_single_website(as_json="--json" in sys.argv))
     else:
-        asyncio.run(test_renderer())
\ No newline at end of file
+        run(test_renderer())
\ No newline at end of file
@@ -2,8 +2,8 @@
 """
 Test screenshot functionality
 """
-import asyncio
 from simple_real_backend import capture_website_screenshot
+from app.core.event_loop import run
 
 async def test_screenshot():
     try:
@@ -25,4 +25,4 @@ async def test_screenshot():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(test_screenshot())
\ No newline at end of file
+    run(test_screenshot())
\ No newline at end of file
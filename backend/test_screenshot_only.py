@@ -2,8 +2,8 @@
 """
 Test just the screenshot function
 """
-import asyncio
 from simple_real_backend import capture_website_screenshot
+from app.core.event_loop import run
 
 async def test_screenshot_only():
     try:
@@ -28,4 +28,4 @@ async def test_screenshot_only():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(test_screenshot_only())
\ No newline at end of file
+    run(test_screenshot_only())
\ No newline at end of file
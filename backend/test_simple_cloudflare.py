@@ -2,8 +2,8 @@
 """
 Simple test for Cloudflare bypass
 """
-import asyncio
 from simple_real_backend import analyze_website_simple
+from app.core.event_loop import run
 
 async def test_simple():
     try:
@@ -24,4 +24,4 @@ async def test_simple():
         traceback.print_exc()
 
 if __name__ == "__main__":
-    asyncio.run(test_simple())
\ No newline at end of file
+    run(test_simple())
\ No newline at end of file
@@ -2,8 +2,8 @@
 """
 Test full-page with a simple site
 """
-import asyncio
 from simple_real_backend import analyze_website_simple
+from app.core.event_loop import run
 
 async def test_simple_fullpage():
     try:
@@ -33,4 +33,4 @@ async def test_simple_fullpage():
         print(f"ERROR: {str(e)}")
 
 if __name__ == "__main__":
-    asyncio.run(test_simple_fullpage())
\ No newline at end of file
+    run(test_simple_fullpage())
\ No newline at end of file
@@ -2,8 +2,8 @@
 """
 Test with a site that has images to see visual issues
 """
-import asyncio
 from simple_real_backend import analyze_website_simple
+from app.core.event_loop import run
 
 async def test_site_with_images():
     try:
@@ -31,4 +31,4 @@ async def test_site_with_images():
         print(f"ERROR: {e}")
 
 if __name__ == "__main__":
-    asyncio.run(test_site_with_images())
\ No newline at end of file
+    run(test_site_with_images())
\ No newline at end of file
@@ -5,11 +5,81 @@ Test script for the enhanced visual analysis module
 import asyncio
 import json
 import sys
+from bisect import bisect_right
+from collections import Counter, defaultdict
+from itertools import islice
+import numpy as np
 from app.modules.renderer import WebsiteRenderer
-from app.modules.visual_analysis import AdvancedVisualAnalyzer
+from app.modules.visual_analysis import analyze_visual, _parse_color
+from app.modules.contrast_kernels import contrast_ratios
+from app.core.event_loop import run
+
+# Lookup tables shared by the report printers
+_GRADE_THRESHOLDS = (60, 70, 80, 90)
+_GRADES = "FDCBA"
+_SEVERITY_EMOJI = {'high': '🔴', 'medium': '🟡', 'low': '🔵'}
+
+def _visual_inputs(page_data):
+    """Map WebsiteRenderer output onto analyze_visual's arguments, as the API does"""
+    dom = page_data.get('text_content', page_data.get('html_content', ''))
+    css_snapshot = {
+        'computed_styles': page_data.get('computed_styles', {}),
+        'elements': page_data.get('elements', [])
+    }
+    viewport = (page_data.get('viewport_width', 1440), page_data.get('viewport_height', 900))
+    return dom, css_snapshot, viewport
+
+def _score_breakdown(features):
+    """Per-rule scores from a report's features, keyed by rule name"""
+    return {
+        name[:-len('_score')]: score
+        for name, score in features.items() if name.endswith('_score')
+    }
+
+def _print_visual_summary(result):
+    """Print the summary block for one visual analysis report (as a dict)"""
+    print(f"✅ Analysis complete!")
+    print(f"📊 Visual Score: {result.get('score', 0)}/100")
+
+    # Score breakdown
+    features = result.get('features', {})
+    breakdown = _score_breakdown(features)
+    print(f"📋 Score Breakdown:")
+    for category, score in breakdown.items():
+        print(f"   {category.replace('_', ' ').title()}: {score:.1f}")
+
+    # Issues summary
+    issues = result.get('issues', [])
+    if issues:
+        print(f"⚠️  Issues Found: {len(issues)}")
+    
+        # Group issues by type and severity
+        issue_stats = Counter(
+            (issue.get('type', 'unknown'), issue.get('severity', 'unknown'))
+            for issue in issues
+        )
+    
+        for (issue_type, severity), count in issue_stats.items():
+            emoji = _SEVERITY_EMOJI.get(severity, '⚪')
+            print(f"   {emoji} {issue_type.title()}: {count} {severity}")
+    
+        # Show top 3 issues
+        print(f"🔍 Top Issues:")
+        for j, issue in enumerate(islice(issues, 3), 1):
+            severity_emoji = _SEVERITY_EMOJI.get(issue.get('severity'), '⚪')
+            print(f"   {j}. {severity_emoji} {issue.get('selector', 'Unknown')}: {issue.get('message', 'No message')}")
+    else:
+        print("✅ No issues found!")
+
+    # Analysis context
+    if features:
+        print(f"📈 Visual Metrics:")
+        print(f"   Elements Analyzed: {features.get('total_elements', 0)}")
+        print(f"   Viewport: {features.get('viewport_width', 0)}x{features.get('viewport_height', 0)}"
+              f" ({'mobile' if features.get('is_mobile') else 'desktop'})")
 
 async def test_visual_analysis():
-    """Test the enhanced visual analysis with real website data"""
+    """Test the visual analysis with real website data"""
     
     # Test URLs with different visual characteristics
     test_urls = [
@@ -19,9 +89,10 @@ async def test_visual_analysis():
         ("https://news.ycombinator.com", "Text-heavy, minimal design")
     ]
     
-    print("🎨 Testing Enhanced Visual Analysis")
+    print("🎨 Testing Visual Analysis")
     print("=" * 60)
     
+    pending = []
     for i, (url, description) in enumerate(test_urls, 1):
         print(f"\n{i}. Testing: {url}")
         print(f"   Description: {description}")
@@ -32,80 +103,26 @@ async def test_visual_analysis():
             async with WebsiteRenderer() as renderer:
                 print("🔄 Rendering website...")
                 page_data = await renderer.render_website(url)
-                
-                # Analyze visual clarity
-                print("🔍 Analyzing visual clarity...")
-                analyzer = AdvancedVisualAnalyzer()
-                result = analyzer.analyze_visual_clarity(page_data)
-                
-                # Display results
-                print(f"✅ Analysis complete!")
-                print(f"📊 Visual Score: {result.get('visual_score', 0)}/100")
-                print(f"🎯 WCAG Level: {result.get('wcag_compliance', {}).get('level', 'Unknown')}")
-                
-                # Score breakdown
-                breakdown = result.get('score_breakdown', {})
-                print(f"📋 Score Breakdown:")
-                for category, score in breakdown.items():
-                    print(f"   {category.replace('_', ' ').title()}: {score:.1f}")
-                
-                # Issues summary
-                issues = result.get('issues', [])
-                if issues:
-                    print(f"⚠️  Issues Found: {len(issues)}")
-                    
-                    # Group issues by type and severity
-                    issue_stats = {}
-                    for issue in issues:
-                        issue_type = issue.get('type', 'unknown')
-                        severity = issue.get('severity', 'unknown')
-                        key = f"{issue_type}_{severity}"
-                        issue_stats[key] = issue_stats.get(key, 0) + 1
-                    
-                    for issue_key, count in issue_stats.items():
-                        issue_type, severity = issue_key.split('_', 1)
-                        emoji = {'high': '🔴', 'medium': '🟡', 'low': '🔵'}.get(severity, '⚪')
-                        print(f"   {emoji} {issue_type.title()}: {count} {severity}")
-                    
-                    # Show top 3 issues
-                    print(f"🔍 Top Issues:")
-                    for j, issue in enumerate(issues[:3], 1):
-                        severity_emoji = {'high': '🔴', 'medium': '🟡', 'low': '🔵'}.get(issue.get('severity'), '⚪')
-                        print(f"   {j}. {severity_emoji} {issue.get('element', 'Unknown')}: {issue.get('message', 'No message')}")
-                else:
-                    print("✅ No issues found!")
-                
-                # WCAG compliance details
-                wcag = result.get('wcag_compliance', {})
-                print(f"♿ WCAG Compliance:")
-                print(f"   Level: {wcag.get('level', 'Unknown')}")
-                print(f"   Contrast Issues: {wcag.get('contrast_issues', 0)}")
-                print(f"   Accessibility Issues: {wcag.get('accessibility_issues', 0)}")
-                
-                # Visual metrics
-                metrics = result.get('visual_metrics', {})
-                if metrics:
-                    print(f"📈 Visual Metrics:")
-                    print(f"   DOM Elements: {metrics.get('total_elements', 0)}")
-                    print(f"   CTAs: {metrics.get('cta_count', 0)} (Above fold: {metrics.get('above_fold_ctas', 0)})")
-                    print(f"   Images: {metrics.get('image_count', 0)}")
-                    print(f"   Headings: {metrics.get('heading_count', 0)}")
-                    print(f"   Max Nesting: {metrics.get('max_nesting_depth', 0)}")
-                
-                # Recommendations
-                recommendations = result.get('recommendations', [])
-                if recommendations:
-                    print(f"💡 Top Recommendations:")
-                    for j, rec in enumerate(recommendations[:3], 1):
-                        priority_emoji = {'Critical': '🚨', 'High': '⚡', 'Medium': '📋', 'Low': '💭'}.get(rec.get('priority'), '📝')
-                        print(f"   {j}. {priority_emoji} {rec.get('action', 'Unknown action')}")
-                        print(f"      Category: {rec.get('category', 'Unknown')}")
-                        print(f"      Impact: {rec.get('impact', 'Unknown')}")
+            
+            # Analyze visual clarity in a worker thread so the next render can start
+            print("🔍 Analyzing visual clarity...")
+            task = asyncio.create_task(asyncio.to_thread(analyze_visual, *_visual_inputs(page_data)))
+            pending.append((i, url, task))
                 
         except Exception as e:
             print(f"❌ Error analyzing {url}: {str(e)}")
             continue
     
+    for i, url, task in pending:
+        print(f"\n{i}. Results: {url}")
+        print("-" * 40)
+        
+        try:
+            report = await task
+            _print_visual_summary(report.to_dict())
+        except Exception as e:
+            print(f"❌ Error analyzing {url}: {str(e)}")
+    
     print("\n" + "=" * 60)
     print("🏁 Visual analysis testing complete!")
 
@@ -125,20 +142,13 @@ async def test_single_site_detailed():
             page_data = await renderer.render_website(url)
             
             print("🎨 Performing visual analysis...")
-            analyzer = AdvancedVisualAnalyzer()
-            result = analyzer.analyze_visual_clarity(page_data)
+            result = analyze_visual(*_visual_inputs(page_data)).to_dict()
             
             # Save detailed result
-            filename = f"visual_analysis_{result.get('visual_score', 0):.0f}_score.json"
-            
-            # Remove large data for readability
-            save_result = result.copy()
-            if 'visual_metrics' in save_result:
-                # Keep metrics but limit size
-                pass
+            filename = f"visual_analysis_{result.get('score', 0):.0f}_score.json"
             
             with open(filename, 'w', encoding='utf-8') as f:
-                json.dump(save_result, f, indent=2, default=str)
+                json.dump(result, f, indent=2, default=str)
             
             print(f"💾 Detailed results saved to: {filename}")
             
@@ -146,74 +156,42 @@ async def test_single_site_detailed():
             print(f"\n📊 COMPREHENSIVE VISUAL ANALYSIS RESULTS")
             print("=" * 50)
             print(f"🌐 URL: {url}")
-            print(f"📈 Overall Score: {result.get('visual_score', 0)}/100")
-            print(f"🎯 Grade: {'A' if result.get('visual_score', 0) >= 90 else 'B' if result.get('visual_score', 0) >= 80 else 'C' if result.get('visual_score', 0) >= 70 else 'D' if result.get('visual_score', 0) >= 60 else 'F'}")
+            score = result.get('score', 0)
+            print(f"📈 Overall Score: {score}/100")
+            print(f"🎯 Grade: {_GRADES[bisect_right(_GRADE_THRESHOLDS, score)]}")
             
             # Detailed score breakdown
             print(f"\n📋 DETAILED SCORE BREAKDOWN:")
-            breakdown = result.get('score_breakdown', {})
-            for category, score in breakdown.items():
+            features = result.get('features', {})
+            for category, score in _score_breakdown(features).items():
                 status = "✅" if score >= 80 else "⚠️" if score >= 60 else "❌"
                 print(f"   {status} {category.replace('_', ' ').title(): <15}: {score:5.1f}/100")
             
-            # WCAG compliance details
-            wcag = result.get('wcag_compliance', {})
-            print(f"\n♿ WCAG ACCESSIBILITY COMPLIANCE:")
-            level_emoji = {'AAA': '🥇', 'AA': '🥈', 'FAIL': '❌'}.get(wcag.get('level'), '❓')
-            print(f"   {level_emoji} Compliance Level: {wcag.get('level', 'Unknown')}")
-            print(f"   📊 Total Issues: {wcag.get('total_issues', 0)}")
-            print(f"   🔴 High Priority: {wcag.get('high_priority_issues', 0)}")
-            print(f"   🎨 Contrast Issues: {wcag.get('contrast_issues', 0)}")
-            print(f"   ♿ Accessibility Issues: {wcag.get('accessibility_issues', 0)}")
-            
             # All issues categorized
             issues = result.get('issues', [])
             if issues:
                 print(f"\n⚠️  ALL ISSUES DETECTED ({len(issues)} total):")
                 
                 # Group by type
-                by_type = {}
+                by_type = defaultdict(list)
                 for issue in issues:
-                    issue_type = issue.get('type', 'unknown')
-                    if issue_type not in by_type:
-                        by_type[issue_type] = []
-                    by_type[issue_type].append(issue)
+                    by_type[issue.get('type', 'unknown')].append(issue)
                 
                 for issue_type, type_issues in by_type.items():
                     print(f"\n   📂 {issue_type.upper()} ISSUES ({len(type_issues)}):")
-                    for issue in type_issues[:5]:  # Show first 5 of each type
-                        severity_emoji = {'high': '🔴', 'medium': '🟡', 'low': '🔵'}.get(issue.get('severity'), '⚪')
-                        element = issue.get('element', 'Unknown')[:30]
+                    for issue in islice(type_issues, 5):  # Show first 5 of each type
+                        severity_emoji = _SEVERITY_EMOJI.get(issue.get('severity'), '⚪')
+                        selector = issue.get('selector', 'Unknown')[:30]
                         message = issue.get('message', 'No message')[:60]
-                        print(f"      {severity_emoji} {element}: {message}")
-                        if 'suggestion' in issue:
-                            print(f"         💡 {issue['suggestion'][:80]}...")
-            
-            # Detailed recommendations
-            recommendations = result.get('recommendations', [])
-            if recommendations:
-                print(f"\n💡 ACTIONABLE RECOMMENDATIONS:")
-                for i, rec in enumerate(recommendations, 1):
-                    priority_emoji = {'Critical': '🚨', 'High': '⚡', 'Medium': '📋', 'Low': '💭'}.get(rec.get('priority'), '📝')
-                    print(f"\n   {i}. {priority_emoji} {rec.get('action', 'Unknown action')}")
-                    print(f"      📂 Category: {rec.get('category', 'Unknown')}")
-                    print(f"      📊 Priority: {rec.get('priority', 'Unknown')}")
-                    print(f"      📝 Description: {rec.get('description', 'No description')}")
-                    print(f"      🎯 Impact: {rec.get('impact', 'Unknown impact')}")
-                    print(f"      ⚡ Effort: {rec.get('effort', 'Unknown effort')}")
+                        print(f"      {severity_emoji} {selector}: {message}")
             
-            # Visual metrics summary
-            metrics = result.get('visual_metrics', {})
-            if metrics:
+            # Analysis context
+            if features:
                 print(f"\n📈 VISUAL STRUCTURE METRICS:")
-                print(f"   🏗️  DOM Elements: {metrics.get('total_elements', 0)}")
-                print(f"   🔘 Call-to-Actions: {metrics.get('cta_count', 0)}")
-                print(f"   👆 Above Fold CTAs: {metrics.get('above_fold_ctas', 0)}")
-                print(f"   🖼️  Images: {metrics.get('image_count', 0)}")
-                print(f"   📝 Headings: {metrics.get('heading_count', 0)}")
-                print(f"   📋 Forms: {metrics.get('form_count', 0)}")
-                print(f"   🎨 Stylesheets: {metrics.get('stylesheet_count', 0)}")
-                print(f"   📊 Max Nesting Depth: {metrics.get('max_nesting_depth', 0)}")
+                print(f"   🏗️  Elements Analyzed: {features.get('total_elements', 0)}")
+                print(f"   ⚠️  Total Issues: {features.get('total_issues', 0)}")
+                print(f"   🖥️  Viewport: {features.get('viewport_width', 0)}x{features.get('viewport_height', 0)}")
+                print(f"   📱 Mobile Rules: {'Yes' if features.get('is_mobile') else 'No'}")
             
             print(f"\n💾 Full analysis data saved to: {filename}")
             
@@ -225,8 +203,6 @@ def test_color_parsing():
     print("\n🎨 Testing Color Parsing")
     print("=" * 30)
     
-    analyzer = AdvancedVisualAnalyzer()
-    
     test_colors = [
         "rgb(255, 255, 255)",
         "rgb(0, 0, 0)", 
@@ -242,7 +218,7 @@ def test_color_parsing():
     
     for color in test_colors:
         try:
-            rgb = analyzer._parse_color_to_rgb(color)
+            rgb = _parse_color(color)
             if rgb:
                 print(f"✅ {color: <20} -> RGB{rgb}")
             else:
@@ -259,20 +235,18 @@ def test_color_parsing():
         ((255, 0, 0), (0, 255, 0)),        # Red on green - poor
     ]
     
-    for bg, text in test_pairs:
-        try:
-            contrast = analyzer._calculate_wcag_contrast(bg, text)
-            aa_pass = "✅" if contrast >= 4.5 else "❌"
-            aaa_pass = "✅" if contrast >= 7.0 else "❌"
-            print(f"   BG{bg} + Text{text}: {contrast:.2f} (AA:{aa_pass} AAA:{aaa_pass})")
-        except Exception as e:
-            print(f"   BG{bg} + Text{text}: Error - {str(e)}")
+    # One kernel call scores every pair
+    bgs, texts = (np.array(colors) for colors in zip(*test_pairs))
+    for (bg, text), contrast in zip(test_pairs, contrast_ratios(texts, bgs)):
+        aa_pass = "✅" if contrast >= 4.5 else "❌"
+        aaa_pass = "✅" if contrast >= 7.0 else "❌"
+        print(f"   BG{bg} + Text{text}: {contrast:.2f} (AA:{aa_pass} AAA:{aaa_pass})")
 
 if __name__ == "__main__":
     if len(sys.argv) > 1:
         if sys.argv[1] == "--single":
-            asyncio.run(test_single_site_detailed())
+            run(test_single_site_detailed())
         elif sys.argv[1] == "--color":
             test_color_parsing()
     else:
-        asyncio.run(test_visual_analysis())
\ No newline at end of file
+        run(test_visual_analysis())
@@ -2,9 +2,9 @@
 """
 Test website type detection directly
 """
-import asyncio
 import requests
 import json
+from app.core.event_loop import run
 
 async def test_website_type_detection():
     """Test website type detection"""
@@ -51,4 +51,4 @@ async def test_website_type_detection():
             print(f"Failed to test {url}: {str(e)}")
 
 if __name__ == "__main__":
-    asyncio.run(test_website_type_detection())
\ No newline at end of file
+    run(test_website_type_detection())
\ No newline at end of file
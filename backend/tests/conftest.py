@@ -0,0 +1,89 @@
+"""
+Shared pytest fixtures and sample data
+"""
+
+import atexit
+import shutil
+import tempfile
+from pathlib import Path
+
+import pytest
+import pytest_asyncio
+
+
+# Sample HTML with accessibility violations for testing
+SAMPLE_HTML_WITH_VIOLATIONS = """
+<!DOCTYPE html>
+<html>
+<head>
+    <title>Test Page with A11y Issues</title>
+    <style>
+        .low-contrast { color: #ccc; background: #fff; }
+        .very-low-contrast { color: #ddd; background: #fff; }
+    </style>
+</head>
+<body>
+    <!-- Missing H1 heading -->
+    <h2>This should be H1</h2>
+    
+    <!-- Low contrast text -->
+    <p class="low-contrast">This text has poor contrast ratio</p>
+    <p class="very-low-contrast">This text has very poor contrast</p>
+    
+    <!-- Image without alt text -->
+    <img src="data:image/gif;base64,R0lGODlhAQABAIAAAAAAAP///yH5BAEAAAAALAAAAAABAAEAAAIBRAA7" width="100" height="100">
+    
+    <!-- Input without label -->
+    <form>
+        <input type="text" placeholder="Enter your name">
+        <button type="submit">Submit</button>
+    </form>
+    
+    <!-- Content not in landmarks -->
+    <div>
+        <p>This content is not in proper landmark regions</p>
+    </div>
+</body>
+</html>
+"""
+
+# Written once at import so tests can use a plain file:// URL without a fixture
+_SAMPLE_HTML_DIR = Path(tempfile.mkdtemp(prefix="a11y-"))
+_SAMPLE_HTML_PATH = _SAMPLE_HTML_DIR / "sample.html"
+_SAMPLE_HTML_PATH.write_text(SAMPLE_HTML_WITH_VIOLATIONS)
+atexit.register(shutil.rmtree, _SAMPLE_HTML_DIR, ignore_errors=True)
+SAMPLE_HTML_URL = _SAMPLE_HTML_PATH.as_uri()
+
+
+def _chromium_installed() -> bool:
+    """Check for Playwright's Chromium build without launching it"""
+    try:
+        # Imported here so runs without browser tests never load Playwright
+        from playwright.sync_api import sync_playwright
+        
+        with sync_playwright() as p:
+            return Path(p.chromium.executable_path).exists()
+    except Exception:
+        return False
+
+
+def pytest_collection_modifyitems(config, items):
+    """Skip tests marked requires_chromium up front when no browser is installed"""
+    marked = [item for item in items if item.get_closest_marker("requires_chromium")]
+    if not marked or _chromium_installed():
+        return
+    
+    skip = pytest.mark.skip(reason="Playwright Chromium is not installed (run `playwright install chromium`)")
+    for item in marked:
+        item.add_marker(skip)
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def browser():
+    """One headless Chromium for the whole session (pay browser start-up once)"""
+    from playwright.async_api import async_playwright
+    
+    async with async_playwright() as p:
+        browser = await p.chromium.launch(headless=True)
+        yield browser
+        await browser.close()
@@ -3,6 +3,8 @@ Tests for CTA detector module
 """
 
 import pytest
+from collections.abc import Mapping
+from types import MappingProxyType
 from app.modules.cta_detector import (
     CTADetector, 
     detect_ctas, 
@@ -81,7 +83,7 @@ SAMPLE_HTML = """
 """
 
 # Sample element bounding boxes data
-SAMPLE_ELEMENT_BOXES = [
+_RAW_ELEMENT_BOXES = [
     {
         'selector': 'button#main-cta',
         'text': 'Get Started Free',
@@ -154,8 +156,22 @@ SAMPLE_ELEMENT_BOXES = [
     }
 ]
 
+# Sample fixtures are shared by every test (and class-scoped fixtures), so they
+# are exposed read-only: any in-place mutation by the detector raises TypeError
+SAMPLE_ELEMENT_BOXES = tuple(
+    MappingProxyType({**box, 'bbox': MappingProxyType(box['bbox'])})
+    for box in _RAW_ELEMENT_BOXES
+)
+
+# Allowed values of CTAAnalysis.element_type and CTAIssue.severity
+VALID_ELEMENT_TYPES = frozenset({'button', 'link', 'input', 'element'})
+VALID_SEVERITIES = frozenset({'high', 'medium', 'low'})
+
+# Sample boxes indexed by their text, for lookups of a specific CTA
+BOX_BY_TEXT = {box['text']: box for box in SAMPLE_ELEMENT_BOXES}
+
 # Sample computed styles
-SAMPLE_COMPUTED_STYLES = {
+_RAW_COMPUTED_STYLES = {
     'button#main-cta': {
         'backgroundColor': 'rgb(0, 123, 255)',
         'color': 'rgb(255, 255, 255)',
@@ -170,54 +186,125 @@ SAMPLE_COMPUTED_STYLES = {
     }
 }
 
+SAMPLE_COMPUTED_STYLES = MappingProxyType(
+    {selector: MappingProxyType(styles) for selector, styles in _RAW_COMPUTED_STYLES.items()}
+)
+
+
+# Baseline CTAAnalysis fields; tests override only what they care about
+_CTA_DEFAULTS = MappingProxyType(dict(
+    selector='button', text='CTA', element_type='button',
+    bbox=MappingProxyType({}), is_primary=False, above_fold=True,
+    visibility_score=0, contrast_ratio=0,
+    tap_target_score=0, text_clarity_score=0,
+    overall_score=0
+))
+
+
+def make_cta(**overrides) -> CTAAnalysis:
+    """Build a CTAAnalysis from _CTA_DEFAULTS with the given fields replaced"""
+    return CTAAnalysis(**{**_CTA_DEFAULTS, **overrides})
+
+
+def _mentions(keyword):
+    """Check for a (score, issues) result with an issue message containing keyword"""
+    return lambda result: any(keyword in issue.message.lower() for issue in result[1])
+
+
+# (helper method, positional args, check on the helper's return value)
+UNIT_CASES = [
+    # Tap targets: small loses points with a "too small" issue, 50x50 is perfect
+    pytest.param('_analyze_tap_target', ({'width': 30, 'height': 20},),
+                 lambda r: r[0] < 100 and _mentions('too small')(r), id="tap_target-small"),
+    pytest.param('_analyze_tap_target', ({'width': 50, 'height': 50},),
+                 lambda r: r == (100, []), id="tap_target-good"),
+    
+    # Text clarity
+    pytest.param('_analyze_text_clarity', ('Get Started',),
+                 lambda r: r[0] > 80, id="text_clarity-good"),
+    pytest.param('_analyze_text_clarity', ('Start Your Amazing Journey With Our Comprehensive Platform Today',),
+                 lambda r: r[0] < 100 and _mentions('long')(r), id="text_clarity-too-long"),
+    pytest.param('_analyze_text_clarity', ('Leverage Our Platform',),
+                 lambda r: r[0] < 100 and _mentions('jargon')(r), id="text_clarity-jargon"),
+    pytest.param('_analyze_text_clarity', ('Click Here',),
+                 lambda r: r[0] < 100 and _mentions('vague')(r), id="text_clarity-vague"),
+    
+    # Element type from selector
+    pytest.param('_get_element_type', ('button#main-cta',), lambda r: r == 'button', id="element_type-button"),
+    pytest.param('_get_element_type', ('input[type="submit"]',), lambda r: r == 'input', id="element_type-input"),
+    pytest.param('_get_element_type', ('a.btn-primary',), lambda r: r == 'link', id="element_type-link"),
+    pytest.param('_get_element_type', ('div.cta',), lambda r: r == 'element', id="element_type-element"),
+    
+    # Potential CTA identification: by tag, CTA class, CTA text; plain text is not a CTA
+    pytest.param('_is_potential_cta', ('button.primary', 'Get Started', {}, {}), bool, id="potential_cta-button"),
+    pytest.param('_is_potential_cta', ('div.cta', 'Download', {}, {}), bool, id="potential_cta-class"),
+    pytest.param('_is_potential_cta', ('div.some-class', 'Buy Now', {}, {}), bool, id="potential_cta-text"),
+    pytest.param('_is_potential_cta', ('p.text', 'This is just text', {}, {}),
+                 lambda r: not r, id="potential_cta-plain-text"),
+    
+    # Overall score: perfect, poor and mixed inputs
+    pytest.param('_calculate_overall_score', (100, 7.0, 100, 100), lambda r: r == 100, id="overall_score-perfect"),
+    pytest.param('_calculate_overall_score', (20, 2.0, 30, 40), lambda r: r < 50, id="overall_score-poor"),
+    pytest.param('_calculate_overall_score', (80, 4.5, 90, 70), lambda r: 70 <= r <= 90, id="overall_score-mixed"),
+]
+
+
+@pytest.fixture(scope="class")
+def detector():
+    """CTADetector shared by the tests of a class"""
+    return CTADetector(viewport_width=1440, viewport_height=900)
+
+
+@pytest.fixture(scope="module")
+def module_report():
+    """CTAReport for the sample page via detect_ctas, computed once for the module"""
+    return detect_ctas(
+        SAMPLE_HTML,
+        SAMPLE_ELEMENT_BOXES,
+        SAMPLE_COMPUTED_STYLES,
+        viewport_width=1440,
+        viewport_height=900
+    )
+
 
 class TestCTADetector:
     """Test cases for CTADetector"""
     
-    def test_cta_detection_basic(self):
+    def test_cta_detection_basic(self, module_report):
         """Test basic CTA detection"""
-        detector = CTADetector(viewport_width=1440, viewport_height=900)
-        report = detector.detect_ctas(SAMPLE_HTML, SAMPLE_ELEMENT_BOXES, SAMPLE_COMPUTED_STYLES)
-        
         # Should be a CTAReport
-        assert isinstance(report, CTAReport)
+        assert isinstance(module_report, CTAReport)
         
         # Should find multiple CTAs
-        assert len(report.ctas) >= 5
-        assert report.total_ctas_found >= 5
+        assert len(module_report.ctas) >= 5
+        assert module_report.total_ctas_found >= 5
         
         # Should have processing time
-        assert report.processing_time > 0
+        assert module_report.processing_time > 0
     
-    def test_primary_cta_identification(self):
+    def test_primary_cta_identification(self, module_report):
         """Test primary CTA identification"""
-        detector = CTADetector(viewport_width=1440, viewport_height=900)
-        report = detector.detect_ctas(SAMPLE_HTML, SAMPLE_ELEMENT_BOXES, SAMPLE_COMPUTED_STYLES)
-        
         # Should identify a primary CTA
-        assert report.primary_cta is not None
-        assert report.primary_cta.is_primary is True
+        assert module_report.primary_cta is not None
+        assert module_report.primary_cta.is_primary is True
         
         # Primary CTA should have good characteristics
-        primary = report.primary_cta
+        primary = module_report.primary_cta
         assert primary.above_fold  # Should be above fold
         assert primary.overall_score > 50  # Should have decent score
         
         # Primary should be in the list of CTAs
-        assert primary in report.ctas
+        assert primary in module_report.ctas
     
-    def test_cta_analysis_structure(self):
+    def test_cta_analysis_structure(self, module_report):
         """Test CTA analysis data structure"""
-        detector = CTADetector()
-        report = detector.detect_ctas(SAMPLE_HTML, SAMPLE_ELEMENT_BOXES, SAMPLE_COMPUTED_STYLES)
-        
-        for cta in report.ctas:
+        for cta in module_report.ctas:
             # Check structure
             assert isinstance(cta, CTAAnalysis)
             assert cta.selector
             assert cta.text
-            assert cta.element_type in ['button', 'link', 'input', 'element']
-            assert isinstance(cta.bbox, dict)
+            assert cta.element_type in VALID_ELEMENT_TYPES
+            assert isinstance(cta.bbox, Mapping)
             assert 'x' in cta.bbox and 'y' in cta.bbox
             assert 'width' in cta.bbox and 'height' in cta.bbox
             
@@ -229,145 +316,50 @@ class TestCTADetector:
             
             # Check issues
             assert isinstance(cta.issues, list)
-            for issue in cta.issues:
-                assert isinstance(issue, CTAIssue)
-                assert issue.type
-                assert issue.severity in ['high', 'medium', 'low']
-                assert issue.message
-                assert issue.suggestion
+            assert all(isinstance(issue, CTAIssue) for issue in cta.issues)
+            assert all(issue.severity in VALID_SEVERITIES for issue in cta.issues)
+            assert all(issue.type and issue.message and issue.suggestion for issue in cta.issues)
     
-    def test_above_fold_detection(self):
+    def test_above_fold_detection(self, module_report):
         """Test above/below fold detection"""
-        detector = CTADetector(viewport_width=1440, viewport_height=900)
-        report = detector.detect_ctas(SAMPLE_HTML, SAMPLE_ELEMENT_BOXES, SAMPLE_COMPUTED_STYLES)
-        
         # Should have both above and below fold CTAs
-        above_fold_ctas = [cta for cta in report.ctas if cta.above_fold]
-        below_fold_ctas = [cta for cta in report.ctas if not cta.above_fold]
+        above_fold_ctas, below_fold_ctas = [], []
+        for cta in module_report.ctas:
+            (above_fold_ctas if cta.above_fold else below_fold_ctas).append(cta)
         
         assert len(above_fold_ctas) > 0
         assert len(below_fold_ctas) > 0
-        assert report.above_fold_ctas == len(above_fold_ctas)
+        assert module_report.above_fold_ctas == len(above_fold_ctas)
         
         # CTAs with y > 900 should be below fold
         for cta in below_fold_ctas:
             assert cta.bbox.get('y', 0) > 900
     
-    def test_visibility_analysis(self):
+    def test_visibility_analysis(self, detector):
         """Test CTA visibility analysis"""
-        detector = CTADetector()
-        
         # Test small CTA (should have visibility issues)
-        small_cta = next(cta for cta in SAMPLE_ELEMENT_BOXES if cta['text'] == 'Buy')
+        small_cta = BOX_BY_TEXT['Buy']
         analysis = detector._analyze_single_cta(small_cta, None)
         
         assert analysis.visibility_score < 100  # Should lose points for small size
         visibility_issues = [issue for issue in analysis.issues if issue.type == 'visibility']
         assert len(visibility_issues) > 0
     
-    def test_tap_target_analysis(self):
-        """Test tap target analysis"""
-        detector = CTADetector()
-        
-        # Small tap target
-        small_bbox = {'width': 30, 'height': 20}
-        score, issues = detector._analyze_tap_target(small_bbox)
-        
-        assert score < 100  # Should lose points
-        assert len(issues) > 0
-        assert any('too small' in issue.message.lower() for issue in issues)
-        
-        # Good tap target
-        good_bbox = {'width': 50, 'height': 50}
-        score, issues = detector._analyze_tap_target(good_bbox)
-        
-        assert score == 100  # Should be perfect
-        assert len(issues) == 0
-    
-    def test_text_clarity_analysis(self):
-        """Test text clarity analysis"""
-        detector = CTADetector()
-        
-        # Good CTA text
-        score, issues = detector._analyze_text_clarity('Get Started')
-        assert score > 80
-        
-        # Poor CTA text - too long
-        score, issues = detector._analyze_text_clarity('Start Your Amazing Journey With Our Comprehensive Platform Today')
-        assert score < 100
-        long_text_issues = [issue for issue in issues if 'long' in issue.message.lower()]
-        assert len(long_text_issues) > 0
-        
-        # Poor CTA text - jargon
-        score, issues = detector._analyze_text_clarity('Leverage Our Platform')
-        assert score < 100
-        jargon_issues = [issue for issue in issues if 'jargon' in issue.message.lower()]
-        assert len(jargon_issues) > 0
-        
-        # Poor CTA text - vague
-        score, issues = detector._analyze_text_clarity('Click Here')
-        assert score < 100
-        vague_issues = [issue for issue in issues if 'vague' in issue.message.lower()]
-        assert len(vague_issues) > 0
-    
-    def test_element_type_detection(self):
-        """Test element type detection"""
-        detector = CTADetector()
-        
-        assert detector._get_element_type('button#main-cta') == 'button'
-        assert detector._get_element_type('input[type="submit"]') == 'input'
-        assert detector._get_element_type('a.btn-primary') == 'link'
-        assert detector._get_element_type('div.cta') == 'element'
-    
-    def test_potential_cta_identification(self):
-        """Test potential CTA identification"""
-        detector = CTADetector()
-        
-        # Clear button should be identified
-        assert detector._is_potential_cta('button.primary', 'Get Started', {}, {})
-        
-        # Element with CTA class should be identified
-        assert detector._is_potential_cta('div.cta', 'Download', {}, {})
-        
-        # Element with CTA text should be identified
-        assert detector._is_potential_cta('div.some-class', 'Buy Now', {}, {})
-        
-        # Random element should not be identified
-        assert not detector._is_potential_cta('p.text', 'This is just text', {}, {})
-    
-    def test_overall_score_calculation(self):
-        """Test overall score calculation"""
-        detector = CTADetector()
-        
-        # Perfect scores should give 100
-        score = detector._calculate_overall_score(100, 7.0, 100, 100)
-        assert score == 100
-        
-        # Poor scores should give low overall score
-        score = detector._calculate_overall_score(20, 2.0, 30, 40)
-        assert score < 50
-        
-        # Mixed scores should give reasonable result
-        score = detector._calculate_overall_score(80, 4.5, 90, 70)
-        assert 70 <= score <= 90
+    @pytest.mark.parametrize("method,args,check", UNIT_CASES)
+    def test_unit(self, detector, method, args, check):
+        """Test the pure _analyze_*/_get_*/_is_*/_calculate_* helpers against a table"""
+        result = getattr(detector, method)(*args)
+        assert check(result), f"{method}{args} -> {result!r}"
 
 
 class TestConvenienceFunction:
     """Test convenience function"""
     
-    def test_detect_ctas_function(self):
+    def test_detect_ctas_function(self, module_report):
         """Test the convenience function"""
-        report = detect_ctas(
-            SAMPLE_HTML, 
-            SAMPLE_ELEMENT_BOXES, 
-            SAMPLE_COMPUTED_STYLES,
-            viewport_width=1440,
-            viewport_height=900
-        )
-        
-        assert isinstance(report, CTAReport)
-        assert len(report.ctas) > 0
-        assert report.primary_cta is not None
+        assert isinstance(module_report, CTAReport)
+        assert len(module_report.ctas) > 0
+        assert module_report.primary_cta is not None
 
 
 class TestDataStructures:
@@ -412,21 +404,8 @@ class TestDataStructures:
     
     def test_cta_report(self):
         """Test CTAReport"""
-        cta1 = CTAAnalysis(
-            selector='button#1', text='CTA 1', element_type='button',
-            bbox={}, is_primary=False, above_fold=True,
-            visibility_score=80, contrast_ratio=4.5,
-            tap_target_score=90, text_clarity_score=85,
-            overall_score=85
-        )
-        
-        cta2 = CTAAnalysis(
-            selector='button#2', text='CTA 2', element_type='button',
-            bbox={}, is_primary=True, above_fold=False,
-            visibility_score=90, contrast_ratio=5.0,
-            tap_target_score=95, text_clarity_score=90,
-            overall_score=92
-        )
+        cta1 = make_cta(selector='button#1', text='CTA 1', overall_score=85)
+        cta2 = make_cta(selector='button#2', text='CTA 2', is_primary=True, above_fold=False, overall_score=92)
         
         report = CTAReport(
             ctas=[cta1, cta2],
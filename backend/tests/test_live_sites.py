@@ -0,0 +1,75 @@
+"""
+Live-site checks for the renderer and the simple analysis backend
+
+Consolidates the single-purpose test_*.py scripts in backend/ into one
+pytest module so a suite run pays interpreter start-up and browser launch
+once instead of once per script.
+"""
+
+import pytest
+import pytest_asyncio
+from app.modules.renderer import WebsiteRenderer
+from simple_real_backend import analyze_website_simple, capture_website_screenshot
+
+# Every test here hits the internet; deselected by default (see pytest.ini)
+pytestmark = pytest.mark.live
+
+# Sites exercised by test_renderer.py / test_visual_analysis.py
+RENDER_URLS = [
+    "https://example.com",
+    "https://github.com",
+]
+
+# Sites exercised by test_simple_fullpage.py, test_site_with_images.py and test_simple_cloudflare.py
+SIMPLE_ANALYSIS_URLS = [
+    "https://example.com",
+    "https://github.com",
+    "https://discord.com",
+]
+
+
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def renderer():
+    """Single WebsiteRenderer (one Chromium launch) shared by the whole session"""
+    async with WebsiteRenderer() as r:
+        yield r
+
+
+@pytest.mark.requires_chromium
+class TestWebsiteRenderer:
+    """Render real websites through the shared renderer"""
+
+    @pytest.mark.parametrize("url", RENDER_URLS)
+    async def test_render(self, renderer, url):
+        """Rendering returns page metadata, DOM analysis and screenshots"""
+        result = await renderer.render_website(url)
+
+        assert result.get('title') is not None
+        assert result.get('page_hash')
+        assert 'dom_analysis' in result
+
+        screenshots = result.get('screenshots', {})
+        assert any(key != 'error' for key in screenshots)
+
+        perf = result.get('performance', {})
+        assert perf.get('response_status') and perf['response_status'] < 400
+
+
+class TestSimpleBackend:
+    """Exercise simple_real_backend the way the backend/test_simple_* scripts do"""
+
+    @pytest.mark.parametrize("url", SIMPLE_ANALYSIS_URLS)
+    async def test_analyze_website_simple(self, url):
+        """Simple analysis returns scores and categorized issues"""
+        result = await analyze_website_simple(url)
+
+        assert 0 <= result['overall_score'] <= 100
+        assert result['total_issues'] == len(result['visual_issues']) + len(result['text_seo_issues'])
+        assert result['url_analyzed'] == url
+
+    @pytest.mark.requires_chromium
+    async def test_capture_screenshot(self):
+        """Screenshot capture returns a PNG data URL (test_screenshot*.py)"""
+        screenshot_url = await capture_website_screenshot("https://example.com")
+
+        assert screenshot_url.startswith("data:image/png;base64,")
@@ -3,11 +3,13 @@ Tests for multi-viewport renderer module
 """
 
 import asyncio
+import base64
 import pytest
+import pytest_asyncio
 import tempfile
 import os
-import json
-from unittest.mock import Mock, patch
+import fakeredis
+from unittest.mock import AsyncMock, MagicMock, patch
 from app.modules.multi_viewport_renderer import (
     MultiViewportRenderer, 
     render_multi_viewport,
@@ -15,9 +17,14 @@ from app.modules.multi_viewport_renderer import (
     ViewportConfig, 
     TimingConfig,
     ViewportRenderResult,
-    MultiViewportReport
+    MultiViewportReport,
+    CDP_STYLE_PROPERTIES
 )
 
+# Keep the module on one xdist worker (run with `-n auto --dist loadgroup`) so the
+# session shared_renderer launches a single browser
+pytestmark = pytest.mark.xdist_group("renderer")
+
 # Simple test HTML
 TEST_HTML = """
 <!DOCTYPE html>
@@ -86,9 +93,24 @@ TEST_HTML = """
 """
 
 
-@pytest.fixture
+# 120 nav links ahead of the main heading, and a block far below the fold
+# (desktop fold 900px + BELOW_FOLD_MARGIN < 5000px)
+EXTRACTION_HTML = """
+<!DOCTYPE html>
+<html>
+<body style="margin: 0">
+    <nav>%s</nav>
+    <h1 id="main-title">Main heading</h1>
+    <button id="cta">Get started</button>
+    <div id="deep" style="position: absolute; top: 5000px">Footer block</div>
+</body>
+</html>
+""" % ''.join(f'<a href="#{i}">Link {i}</a> ' for i in range(120))
+
+
+@pytest.fixture(scope="session")
 def test_html_file():
-    """Create a temporary HTML file for testing"""
+    """Create a temporary HTML file once for the session (TEST_HTML never changes)"""
     with tempfile.NamedTemporaryFile(mode='w', suffix='.html', delete=False) as f:
         f.write(TEST_HTML)
         f.flush()
@@ -104,177 +126,173 @@ def test_html_file():
 
 
 @pytest.fixture
-def mock_redis():
-    """Mock Redis client for testing caching"""
-    with patch('redis.from_url') as mock_redis:
-        mock_client = Mock()
-        mock_client.ping.return_value = True
-        mock_client.get.return_value = None
-        mock_client.setex.return_value = True
-        mock_redis.return_value = mock_client
-        yield mock_client
+def fake_redis():
+    """In-memory Redis server (fakeredis) standing in for the cache"""
+    client = fakeredis.FakeRedis(server=fakeredis.FakeServer())
+    with patch('redis.from_url', return_value=client):
+        yield client
+
+
+@pytest.fixture(scope="session")
+def cache_prefix():
+    """Per-xdist-worker Redis key namespace so parallel workers don't share cache entries"""
+    return f"mvr-test-{os.environ.get('PYTEST_XDIST_WORKER', 'gw0')}"
 
 
+@pytest_asyncio.fixture(scope="session", loop_scope="session")
+async def shared_renderer(cache_prefix):
+    """Single MultiViewportRenderer (one Chromium launch) shared by the session"""
+    async with MultiViewportRenderer(cache_prefix=cache_prefix) as renderer:
+        yield renderer
+
+
+@pytest.mark.requires_chromium
 class TestMultiViewportRenderer:
     """Test cases for MultiViewportRenderer"""
     
-    @pytest.mark.asyncio
-    async def test_basic_multi_viewport_rendering(self, test_html_file):
+    async def test_basic_multi_viewport_rendering(self, shared_renderer, test_html_file):
         """Test basic multi-viewport rendering functionality"""
-        async with MultiViewportRenderer() as renderer:
-            report = await renderer.render_multi_viewport(
-                test_html_file,
-                viewports=['desktop', 'mobile'],
-                timings=['T1'],
-                use_cache=False
-            )
-            
-            # Should be a MultiViewportReport
-            assert isinstance(report, MultiViewportReport)
-            assert report.url == test_html_file
-            
-            # Should have results for both viewports
-            assert len(report.results) == 2  # desktop + mobile
-            
-            # Check viewport names
-            viewport_names = {result.viewport for result in report.results}
-            assert viewport_names == {'desktop', 'mobile'}
-            
-            # Should have processing time
-            assert report.total_processing_time > 0
+        report = await shared_renderer.render_multi_viewport(
+            test_html_file,
+            viewports=['desktop', 'mobile'],
+            timings=['T1'],
+            use_cache=False
+        )
+        
+        # Should be a MultiViewportReport
+        assert isinstance(report, MultiViewportReport)
+        assert report.url == test_html_file
+        
+        # Should have results for both viewports
+        assert len(report.results) == 2  # desktop + mobile
+        
+        # Check viewport names
+        viewport_names = {result.viewport for result in report.results}
+        assert viewport_names == {'desktop', 'mobile'}
+        
+        # Should have processing time
+        assert report.total_processing_time > 0
     
-    @pytest.mark.asyncio
-    async def test_viewport_configurations(self, test_html_file):
+    async def test_viewport_configurations(self, shared_renderer, test_html_file):
         """Test different viewport configurations"""
-        async with MultiViewportRenderer() as renderer:
-            # Test all viewports
-            report = await renderer.render_multi_viewport(
-                test_html_file,
-                viewports=['desktop', 'tablet', 'mobile'],
-                timings=['T1'],
-                use_cache=False
-            )
-            
-            assert len(report.results) == 3
-            
-            # Check each result has proper structure
-            for result in report.results:
-                assert isinstance(result, ViewportRenderResult)
-                assert result.viewport in ['desktop', 'tablet', 'mobile']
-                assert result.timing == 'T1'
-                assert result.dom_content  # Should have DOM content
-                assert isinstance(result.computed_styles, dict)
-                assert isinstance(result.element_bounding_boxes, list)
-                assert result.fold_position > 0
-                assert result.screenshot_base64  # Should have screenshot
-                assert isinstance(result.render_metrics, dict)
-    
-    @pytest.mark.asyncio
-    async def test_timing_configurations(self, test_html_file):
+        # Test all viewports
+        report = await shared_renderer.render_multi_viewport(
+            test_html_file,
+            viewports=['desktop', 'tablet', 'mobile'],
+            timings=['T1'],
+            use_cache=False
+        )
+        
+        assert len(report.results) == 3
+        
+        # Check each result has proper structure
+        for result in report.results:
+            assert isinstance(result, ViewportRenderResult)
+            assert result.viewport in ['desktop', 'tablet', 'mobile']
+            assert result.timing == 'T1'
+            assert result.dom_content  # Should have DOM content
+            assert isinstance(result.computed_styles, dict)
+            assert isinstance(result.element_bounding_boxes, list)
+            assert result.fold_position > 0
+            assert result.screenshot_base64  # Should have screenshot
+            assert isinstance(result.render_metrics, dict)
+    
+    async def test_timing_configurations(self, shared_renderer, test_html_file):
         """Test different timing configurations"""
-        async with MultiViewportRenderer() as renderer:
-            report = await renderer.render_multi_viewport(
-                test_html_file,
-                viewports=['desktop'],
-                timings=['T1', 'T2'],
-                use_cache=False
-            )
-            
-            assert len(report.results) == 2  # T1 + T2
-            
-            timing_names = {result.timing for result in report.results}
-            assert timing_names == {'T1', 'T2'}
-            
-            # T2 should generally take longer to process than T1
-            t1_result = next(r for r in report.results if r.timing == 'T1')
-            t2_result = next(r for r in report.results if r.timing == 'T2')
-            
-            # Both should have valid render metrics
-            assert 'render_time' in t1_result.render_metrics
-            assert 'render_time' in t2_result.render_metrics
+        report = await shared_renderer.render_multi_viewport(
+            test_html_file,
+            viewports=['desktop'],
+            timings=['T1', 'T2'],
+            use_cache=False
+        )
+        
+        assert len(report.results) == 2  # T1 + T2
+        
+        timing_names = {result.timing for result in report.results}
+        assert timing_names == {'T1', 'T2'}
+        
+        # T2 should generally take longer to process than T1
+        t1_result = next(r for r in report.results if r.timing == 'T1')
+        t2_result = next(r for r in report.results if r.timing == 'T2')
+        
+        # Both should have valid render metrics
+        assert 'render_time' in t1_result.render_metrics
+        assert 'render_time' in t2_result.render_metrics
+        
+        # A local file is rendered once without waiting; neither copy claims a delay
+        for result in (t1_result, t2_result):
+            assert result.render_metrics['timing_ms'] == 0
+            assert result.render_metrics['collapsed_local'] is True
     
-    @pytest.mark.asyncio
-    async def test_element_bounding_boxes(self, test_html_file):
+    async def test_element_bounding_boxes(self, shared_renderer, test_html_file):
         """Test element bounding box extraction"""
-        async with MultiViewportRenderer() as renderer:
-            report = await renderer.render_multi_viewport(
-                test_html_file,
-                viewports=['desktop'],
-                timings=['T1'],
-                use_cache=False
-            )
-            
-            result = report.results[0]
-            boxes = result.element_bounding_boxes
-            
-            # Should have detected multiple elements
-            assert len(boxes) > 5
+        report = await shared_renderer.render_multi_viewport(
+            test_html_file,
+            viewports=['desktop'],
+            timings=['T1'],
+            use_cache=False
+        )
+        
+        result = report.results[0]
+        boxes = result.element_bounding_boxes
+        
+        # Should have detected multiple elements
+        assert len(boxes) > 5
+        
+        # Check box structure
+        for box in boxes[:3]:  # Check first few
+            assert 'selector' in box
+            assert 'bbox' in box
+            assert 'text' in box
+            assert 'visible' in box
+            assert 'above_fold' in box
             
-            # Check box structure
-            for box in boxes[:3]:  # Check first few
-                assert 'selector' in box
-                assert 'bbox' in box
-                assert 'text' in box
-                assert 'visible' in box
-                assert 'above_fold' in box
-                
-                # Bounding box should have coordinates
-                bbox = box['bbox']
-                assert 'x' in bbox and 'y' in bbox
-                assert 'width' in bbox and 'height' in bbox
-                assert bbox['width'] >= 0 and bbox['height'] >= 0
-    
-    @pytest.mark.asyncio
-    async def test_computed_styles_extraction(self, test_html_file):
+            # Bounding box should have coordinates
+            bbox = box['bbox']
+            assert 'x' in bbox and 'y' in bbox
+            assert 'width' in bbox and 'height' in bbox
+            assert bbox['width'] >= 0 and bbox['height'] >= 0
+    
+    async def test_computed_styles_extraction(self, shared_renderer, test_html_file):
         """Test computed styles extraction"""
-        async with MultiViewportRenderer() as renderer:
-            report = await renderer.render_multi_viewport(
-                test_html_file,
-                viewports=['desktop'],
-                timings=['T1'],
-                use_cache=False
-            )
-            
-            result = report.results[0]
-            styles = result.computed_styles
-            
-            # Should have extracted styles for multiple elements
-            assert len(styles) > 3
+        report = await shared_renderer.render_multi_viewport(
+            test_html_file,
+            viewports=['desktop'],
+            timings=['T1'],
+            use_cache=False
+        )
+        
+        result = report.results[0]
+        styles = result.computed_styles
+        
+        # Should have extracted styles for multiple elements
+        assert len(styles) > 3
+        
+        # Check style structure
+        for selector, style_dict in list(styles.items())[:2]:
+            assert isinstance(style_dict, dict)
             
-            # Check style structure
-            for selector, style_dict in list(styles.items())[:2]:
-                assert isinstance(style_dict, dict)
-                
-                # Should have key CSS properties
-                expected_properties = ['fontSize', 'color', 'backgroundColor', 'fontFamily']
-                for prop in expected_properties:
-                    assert prop in style_dict
+            # Should have key CSS properties
+            expected_properties = ['fontSize', 'color', 'backgroundColor', 'fontFamily']
+            for prop in expected_properties:
+                assert prop in style_dict
     
-    @pytest.mark.asyncio
-    async def test_screenshot_generation(self, test_html_file):
+    async def test_screenshot_generation(self, shared_renderer, test_html_file):
         """Test screenshot generation for different viewports"""
-        async with MultiViewportRenderer() as renderer:
-            report = await renderer.render_multi_viewport(
-                test_html_file,
-                viewports=['desktop', 'mobile'],
-                timings=['T1'],
-                use_cache=False
-            )
-            
-            for result in report.results:
-                # Should have base64 screenshot
-                assert result.screenshot_base64
-                assert len(result.screenshot_base64) > 1000  # Should be substantial data
-                
-                # Should be valid base64
-                import base64
-                try:
-                    base64.b64decode(result.screenshot_base64)
-                except Exception:
-                    pytest.fail(f"Invalid base64 screenshot for {result.viewport}")
-    
-    @pytest.mark.asyncio
-    async def test_caching_functionality(self, test_html_file, mock_redis):
+        report = await shared_renderer.render_multi_viewport(
+            test_html_file,
+            viewports=['desktop', 'mobile'],
+            timings=['T1'],
+            use_cache=False
+        )
+        
+        for result in report.results:
+            # Should have screenshot bytes
+            assert result.screenshot_bytes
+            assert len(result.screenshot_bytes) > 750  # Should be substantial data (JPEG by default)
+            assert result.screenshot_bytes.startswith(b'\xff\xd8'), f"Invalid JPEG screenshot for {result.viewport}"
+    
+    async def test_caching_functionality(self, test_html_file, fake_redis):
         """Test Redis caching functionality"""
         async with MultiViewportRenderer() as renderer:
             # First call - should cache
@@ -286,22 +304,7 @@ class TestMultiViewportRenderer:
             )
             
             assert not report1.cache_hit  # First call shouldn't be cache hit
-            
-            # Mock cache hit for second call
-            mock_redis.get.return_value = json.dumps({
-                'url': test_html_file,
-                'total_processing_time': 1.0,
-                'results': [{
-                    'viewport': 'desktop',
-                    'timing': 'T1',
-                    'dom_content': '<html></html>',
-                    'computed_styles': {},
-                    'element_bounding_boxes': [],
-                    'fold_position': 900,
-                    'screenshot_base64': 'dGVzdA==',
-                    'render_metrics': {'test': True}
-                }]
-            }).encode()
+            assert fake_redis.exists(report1.cache_key)
             
             # Second call - should hit cache
             report2 = await renderer.render_multi_viewport(
@@ -312,45 +315,370 @@ class TestMultiViewportRenderer:
             )
             
             assert report2.cache_hit  # Should be cache hit
+            assert report2.results == report1.results
     
-    @pytest.mark.asyncio
-    async def test_error_handling(self):
+    async def test_error_handling(self, shared_renderer):
         """Test error handling for invalid URLs"""
-        async with MultiViewportRenderer() as renderer:
-            report = await renderer.render_multi_viewport(
-                "invalid-url",
-                viewports=['desktop'],
-                timings=['T1'],
-                use_cache=False
-            )
-            
-            # Should have error results
-            assert len(report.results) == 1
-            result = report.results[0]
-            assert 'error' in result.render_metrics
+        report = await shared_renderer.render_multi_viewport(
+            "invalid-url",
+            viewports=['desktop'],
+            timings=['T1'],
+            use_cache=False
+        )
+        
+        # Should have error results
+        assert len(report.results) == 1
+        result = report.results[0]
+        assert 'error' in result.render_metrics
+    
+    async def _extract_boxes(self, renderer, tmp_path):
+        """Element boxes the JS extractor returns for EXTRACTION_HTML on a desktop page"""
+        html_file = tmp_path / "extraction.html"
+        html_file.write_text(EXTRACTION_HTML)
+        desktop = MultiViewportRenderer.VIEWPORTS['desktop']
+        
+        page = await renderer._acquire_page(desktop)
+        try:
+            await page.goto(html_file.as_uri(), wait_until='load')
+            _, boxes = await renderer._extract_dom_snapshot(page, desktop.height)
+        finally:
+            await renderer._release_page(desktop, page)
+        return [box['selector'] for box in boxes]
+    
+    async def test_extraction_cap_keeps_selector_priority(self, shared_renderer, tmp_path):
+        """Headings fill the 100-element cap before the links that precede them"""
+        selectors = await self._extract_boxes(shared_renderer, tmp_path)
+        
+        assert len(selectors) == 100
+        assert selectors[0] == 'h1#main-title:nth(0)'
+        assert 'button#cta:nth(1)' not in selectors  # Buttons rank after the 120 links
+    
+    async def test_extraction_prunes_below_fold(self, shared_renderer, tmp_path):
+        """Subtrees starting BELOW_FOLD_MARGIN past the fold are skipped by default"""
+        selectors = await self._extract_boxes(shared_renderer, tmp_path)
+        
+        assert not any(selector.startswith('div#deep') for selector in selectors)
+    
+    async def test_extraction_collect_below_fold(self, shared_renderer, tmp_path, monkeypatch):
+        """collect_below_fold=True measures the whole page"""
+        monkeypatch.setattr(shared_renderer, 'collect_below_fold', True)
+        selectors = await self._extract_boxes(shared_renderer, tmp_path)
+        
+        assert 'div#deep:nth(1)' in selectors
+
+
+def _fake_dom_snapshot():
+    """Minimal DOMSnapshot.captureSnapshot payload: body > h1("Title"), div.cta#hero("Go"), span(0x0)"""
+    strings = []
+    
+    def intern(value):
+        if value not in strings:
+            strings.append(value)
+        return strings.index(value)
+    
+    # (parent, nodeType, nodeName, nodeValue, attributes)
+    node_specs = [
+        (-1, 9, '#document', None, []),
+        (0, 1, 'HTML', None, []),
+        (1, 1, 'BODY', None, []),
+        (2, 1, 'H1', None, []),
+        (3, 3, '#text', ' Title ', []),
+        (2, 1, 'DIV', None, ['class', 'cta main', 'id', 'hero']),
+        (5, 3, '#text', 'Go', []),
+        (2, 1, 'SPAN', None, []),
+    ]
+    nodes = {
+        'parentIndex': [spec[0] for spec in node_specs],
+        'nodeType': [spec[1] for spec in node_specs],
+        'nodeName': [intern(spec[2]) for spec in node_specs],
+        'nodeValue': [intern(spec[3]) if spec[3] is not None else -1 for spec in node_specs],
+        'attributes': [[intern(a) for a in spec[4]] for spec in node_specs],
+    }
+    
+    def styles(display='block'):
+        values = {'font-size': '16px', 'color': 'rgb(0, 0, 0)', 'display': display, 'visibility': 'visible'}
+        return [intern(values.get(css, '')) for _, css in CDP_STYLE_PROPERTIES]
+    
+    # (nodeIndex, bounds)
+    layout_specs = [
+        (1, [0, 0, 1440, 2000]),
+        (2, [0, 0, 1440, 2000]),
+        (3, [20, 20, 400, 40]),
+        (4, [20, 20, 100, 40]),
+        (5, [20, 1200, 200, 50]),
+        (7, [20, 1300, 0, 0]),
+    ]
+    layout = {
+        'nodeIndex': [node for node, _ in layout_specs],
+        'bounds': [bounds for _, bounds in layout_specs],
+        'styles': [styles() for _ in layout_specs],
+    }
     
-    @pytest.mark.asyncio
-    async def test_cache_key_generation(self):
+    return {'documents': [{'nodes': nodes, 'layout': layout}], 'strings': strings}
+
+
+class TestCDPSnapshotParsing:
+    """Test conversion of CDP DOMSnapshot payloads (no browser needed)"""
+    
+    def test_parse_cdp_snapshot(self):
+        """Snapshot is converted to the computed_styles / element_bounding_boxes shapes"""
+        renderer = MultiViewportRenderer(use_cdp_snapshot=True)
+        styles, boxes = renderer._parse_cdp_snapshot(_fake_dom_snapshot(), fold_position=900)
+        
+        # body, h1 and the .cta div get styles; span is neither a key tag nor class
+        assert list(styles) == ['body:nth(0)', 'h1:nth(1)', 'div.cta:nth(2)']
+        assert styles['h1:nth(1)']['fontSize'] == '16px'
+        assert 'visibility' not in styles['h1:nth(1)']
+        
+        # h1 and div have boxes; the zero-sized span is dropped
+        assert [box['selector'] for box in boxes] == ['h1:nth(0)', 'div#hero:nth(1)']
+        h1, div = boxes
+        assert h1['bbox'] == {'x': 20, 'y': 20, 'width': 400, 'height': 40}
+        assert h1['text'] == 'Title'
+        assert h1['above_fold'] and h1['visible']
+        assert div['text'] == 'Go'
+        assert not div['above_fold']
+
+
+class TestCacheSerialization:
+    """Test Redis cache keys and payload round trip (no browser needed)"""
+    
+    def test_cache_round_trip(self, fake_redis):
+        """A saved report reads back intact and flagged as a cache hit"""
+        renderer = MultiViewportRenderer()
+        result = ViewportRenderResult(
+            viewport='desktop',
+            timing='T1',
+            dom_content='<html></html>',
+            computed_styles={'body:nth(0)': {'color': 'rgb(0, 0, 0)'}},
+            element_bounding_boxes=[{'selector': 'h1:nth(0)', 'bbox': {'x': 0, 'y': 0, 'width': 10, 'height': 10}}],
+            fold_position=900,
+            screenshot_bytes=base64.b64decode('dGVzdA=='),
+            render_metrics={'render_time': 0.5},
+            screenshot_format='png'
+        )
+        report = MultiViewportReport(url='http://example.com', results=[result], total_processing_time=1.5)
+        
+        renderer._save_to_cache('mvr:test', report)
+        assert isinstance(fake_redis.get('mvr:test'), bytes)
+        assert 0 < fake_redis.ttl('mvr:test') <= renderer.cache_ttl
+        
+        cached = renderer._get_from_cache('mvr:test')
+        assert cached.cache_hit
+        assert cached.url == report.url
+        assert cached.total_processing_time == report.total_processing_time
+        assert cached.results == [result]
+        assert cached.results[0].screenshot_mime == 'image/png'
+    
+    def test_cache_key_generation(self):
         """Test cache key generation"""
-        async with MultiViewportRenderer() as renderer:
-            key1 = renderer._generate_cache_key("http://example.com", ['desktop'], ['T1'])
-            key2 = renderer._generate_cache_key("http://example.com", ['desktop'], ['T2'])
-            key3 = renderer._generate_cache_key("http://example.com", ['mobile'], ['T1'])
-            
-            # Different parameters should generate different keys
-            assert key1 != key2
-            assert key1 != key3
-            assert key2 != key3
-            
-            # Same parameters should generate same key
-            key4 = renderer._generate_cache_key("http://example.com", ['desktop'], ['T1'])
-            assert key1 == key4
+        renderer = MultiViewportRenderer()
+        key1 = renderer._generate_cache_key("http://example.com", ['desktop'], ['T1'])
+        key2 = renderer._generate_cache_key("http://example.com", ['desktop'], ['T2'])
+        key3 = renderer._generate_cache_key("http://example.com", ['mobile'], ['T1'])
+        
+        # Different parameters should generate different keys
+        assert key1 != key2
+        assert key1 != key3
+        assert key2 != key3
+        
+        # Same parameters should generate same key
+        key4 = renderer._generate_cache_key("http://example.com", ['desktop'], ['T1'])
+        assert key1 == key4
+        
+        # Keys live under the renderer's namespace
+        assert key1.startswith("mvr:")
+        assert MultiViewportRenderer(cache_prefix="mvr-test-gw1")._generate_cache_key(
+            "http://example.com", ['desktop'], ['T1']
+        ) == key1.replace("mvr:", "mvr-test-gw1:", 1)
+        
+        # Order of viewports/timings does not matter
+        key5 = renderer._generate_cache_key("http://example.com", ['mobile', 'desktop'], ['T2', 'T1'])
+        key6 = renderer._generate_cache_key("http://example.com", ['desktop', 'mobile'], ['T1', 'T2'])
+        assert key5 == key6
+
+
+class TestRenderCoalescing:
+    """Test that concurrent identical renders share one in-flight render (no browser needed)"""
+    
+    @staticmethod
+    def _counting_renderer(calls):
+        """Renderer whose viewport renders are stubbed and logged to calls"""
+        renderer = MultiViewportRenderer()
+        
+        async def fake_render(url, viewport, timing, wait_for_timing=True):
+            calls.append((viewport.name, timing.name))
+            await asyncio.sleep(0.01)
+            return ViewportRenderResult(
+                viewport=viewport.name,
+                timing=timing.name,
+                dom_content='<html></html>',
+                computed_styles={},
+                element_bounding_boxes=[],
+                fold_position=viewport.height,
+                screenshot_bytes=b'',
+                render_metrics={}
+            )
+        
+        renderer._render_or_error = fake_render
+        return renderer
+    
+    async def test_singleflight(self, fake_redis):
+        """Concurrent callers get the same report from a single render"""
+        calls = []
+        renderer = self._counting_renderer(calls)
+        
+        def render():
+            return renderer.render_multi_viewport(
+                "http://example.com", viewports=['desktop'], timings=['T1'], use_cache=False
+            )
+        
+        report1, report2 = await asyncio.gather(render(), render())
+        
+        assert calls == [('desktop', 'T1')]
+        assert report1 is report2
+        assert not renderer._inflight
+        
+        # Once finished, the next call renders again
+        await render()
+        assert len(calls) == 2
+    
+    async def test_coalesce_false_renders_every_call(self, fake_redis):
+        """Benchmarks opt out so each concurrent call is its own render"""
+        calls = []
+        renderer = self._counting_renderer(calls)
+        
+        report1, report2 = await asyncio.gather(*(
+            renderer.render_multi_viewport(
+                "http://example.com", viewports=['desktop'], timings=['T1'], use_cache=False, coalesce=False
+            )
+            for _ in range(2)
+        ))
+        
+        assert len(calls) == 2
+        assert report1 is not report2
+        assert not renderer._inflight
+
+
+class TestContextPool:
+    """Test that each in-flight render holds its own context (no browser needed)"""
+    
+    @staticmethod
+    def _mock_browser():
+        async def new_context(**kwargs):
+            context = AsyncMock()
+            context.on = MagicMock()  # Sync event registration
+            context.new_cdp_session.return_value = AsyncMock()
+            page = AsyncMock()
+            page.context = context
+            context.new_page.return_value = page
+            return context
+        
+        browser = MagicMock()
+        browser.new_context = AsyncMock(side_effect=new_context)
+        return browser
+    
+    async def test_concurrent_renders_get_separate_contexts(self, fake_redis):
+        renderer = MultiViewportRenderer()
+        renderer.browser = self._mock_browser()
+        desktop = MultiViewportRenderer.VIEWPORTS['desktop']
+        
+        page1, page2 = await asyncio.gather(
+            renderer._acquire_page(desktop), renderer._acquire_page(desktop)
+        )
+        assert page1.context is not page2.context
+        
+        # Returning one render's context leaves the other's state alone
+        await renderer._release_page(desktop, page1)
+        page1.context.clear_cookies.assert_awaited_once()
+        page1.context.clear_permissions.assert_awaited_once()
+        page2.context.clear_cookies.assert_not_awaited()
+        page2.context.clear_permissions.assert_not_awaited()
+        
+        # The next render reuses the returned context instead of opening one
+        assert await renderer._acquire_page(desktop) is page1
+        assert renderer.browser.new_context.await_count == 2
+    
+    async def test_failed_render_context_is_closed(self, fake_redis):
+        renderer = MultiViewportRenderer()
+        renderer.browser = self._mock_browser()
+        desktop = MultiViewportRenderer.VIEWPORTS['desktop']
+        
+        page = await renderer._acquire_page(desktop)
+        await renderer._release_page(desktop, page, reusable=False)
+        
+        page.context.close.assert_awaited_once()
+        assert not renderer._contexts
+        assert renderer._ctx_pool['desktop'].empty()
+    
+    async def test_returned_context_storage_is_cleared(self, fake_redis):
+        """Origin storage and the HTTP cache of every origin loaded are wiped before reuse"""
+        renderer = MultiViewportRenderer()
+        renderer.browser = self._mock_browser()
+        desktop = MultiViewportRenderer.VIEWPORTS['desktop']
+        
+        page = await renderer._acquire_page(desktop)
+        context = page.context
+        (event, record_origin), _ = context.on.call_args
+        assert event == 'request'
+        for url in ("https://example.com/", "https://cdn.example.net/app.js", "data:text/plain,x"):
+            record_origin(MagicMock(url=url))
+        
+        await renderer._release_page(desktop, page)
+        
+        client = context.new_cdp_session.return_value
+        cleared = {
+            call.args[1]['origin'] for call in client.send.await_args_list
+            if call.args[0] == 'Storage.clearDataForOrigin'
+        }
+        assert cleared == {"https://example.com", "https://cdn.example.net"}
+        client.send.assert_any_await('Network.clearBrowserCache')
+        client.detach.assert_awaited_once()
+        assert renderer._contexts[context] == set()  # Origins start afresh for the next render
+
+
+class TestVisualResourceBlocking:
+    """Test the render_visuals=False request filter (no browser needed)"""
+    
+    @pytest.mark.parametrize("resource_type,aborted", [
+        ('image', True),
+        ('media', True),
+        ('font', True),
+        ('document', False),
+        ('stylesheet', False),
+        ('script', False),
+        ('xhr', False),
+    ])
+    async def test_route_handler(self, resource_type, aborted):
+        route = AsyncMock()
+        route.request = MagicMock(resource_type=resource_type)
+        
+        await MultiViewportRenderer._block_visual_resources(route)
+        
+        if aborted:
+            route.abort.assert_awaited_once()
+            route.continue_.assert_not_awaited()
+        else:
+            route.continue_.assert_awaited_once()
+            route.abort.assert_not_awaited()
+    
+    @pytest.mark.parametrize("render_visuals", [False, True])
+    async def test_route_installed_only_without_visuals(self, fake_redis, render_visuals):
+        renderer = MultiViewportRenderer(render_visuals=render_visuals)
+        renderer.browser = TestContextPool._mock_browser()
+        
+        context = await renderer.new_ephemeral_context(MultiViewportRenderer.VIEWPORTS['desktop'])
+        
+        if render_visuals:
+            context.route.assert_not_awaited()
+        else:
+            context.route.assert_awaited_once_with("**/*", renderer._block_visual_resources)
 
 
+@pytest.mark.requires_chromium
 class TestConvenienceFunctions:
     """Test convenience functions"""
     
-    @pytest.mark.asyncio
     async def test_render_multi_viewport_function(self, test_html_file):
         """Test the convenience function"""
         report = await render_multi_viewport(
@@ -363,7 +691,6 @@ class TestConvenienceFunctions:
         assert isinstance(report, MultiViewportReport)
         assert len(report.results) == 1
     
-    @pytest.mark.asyncio 
     async def test_benchmark_function(self, test_html_file):
         """Test benchmarking functionality"""
         # Use a small number of iterations for testing
@@ -406,7 +733,7 @@ class TestDataStructures:
             computed_styles={'body': {'color': 'black'}},
             element_bounding_boxes=[{'selector': 'body', 'bbox': {'x': 0, 'y': 0, 'width': 100, 'height': 100}}],
             fold_position=800,
-            screenshot_base64='dGVzdA==',
+            screenshot_bytes=base64.b64decode('dGVzdA=='),
             render_metrics={'time': 1.0}
         )
         
@@ -415,6 +742,9 @@ class TestDataStructures:
         assert 'html' in result.dom_content
         assert len(result.computed_styles) == 1
         assert len(result.element_bounding_boxes) == 1
+        assert result.screenshot_bytes == b'test'
+        assert result.screenshot_base64 == 'dGVzdA=='
+        assert result.screenshot_mime == 'image/jpeg'  # Renderer default format
 
 
 if __name__ == "__main__":
@@ -34,9 +34,11 @@ async def debug_analysis():
         
         print(f"\n3. Screenshot Status:")
         screenshot_url = result.get('screenshot_url', '')
-        if screenshot_url:
-            if screenshot_url.startswith('data:image'):
-                print(f"   [OK] Screenshot captured (base64 data, length: {len(screenshot_url)})")
+        # Data URLs can be several MB: take the length once, compare a fixed-size prefix
+        screenshot_len = len(screenshot_url)
+        if screenshot_len:
+            if screenshot_len > 11 and screenshot_url[:11] == 'data:image/':
+                print(f"   [OK] Screenshot captured (base64 data, length: {screenshot_len})")
             else:
                 print(f"   [OK] Screenshot URL: {screenshot_url}")
         else:
@@ -85,4 +87,5 @@ async def debug_analysis():
         return None
 
 if __name__ == "__main__":
-    result = asyncio.run(debug_analysis())
\ No newline at end of file
+    with asyncio.Runner() as loop_runner:
+        result = loop_runner.run(debug_analysis())
\ No newline at end of file
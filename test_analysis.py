@@ -78,5 +78,6 @@ if __name__ == "__main__":
     if sys.platform == "win32":
         asyncio.set_event_loop_policy(asyncio.WindowsSelectorEventLoopPolicy())
     
-    success = asyncio.run(test_analysis())
+    with asyncio.Runner() as loop_runner:
+        success = loop_runner.run(test_analysis())
     exit(0 if success else 1)
\ No newline at end of file